@@ -0,0 +1,83 @@
+import pygame
+
+from constants import ATLAS_PAGE_SIZE
+
+
+def pack(sizes, page_size=ATLAS_PAGE_SIZE):
+    """Раскладка прямоугольников по страницам полками (ряды по высоте).
+
+    sizes: имя -> (w, h). Возвращает (имя -> (страница, x, y), размеры страниц);
+    страницы обрезаны по занятой области.
+    """
+    places = {}
+    pages = []  # [ширина, высота] занятой области
+    page = x = y = shelf = 0
+    # высокие кадры первыми: полки заполняются плотнее
+    for name in sorted(sizes, key=lambda n: (-sizes[n][1], -sizes[n][0], n)):
+        w, h = sizes[name]
+        if w > page_size or h > page_size:
+            raise ValueError(f"кадр {name} ({w}x{h}) больше страницы атласа")
+        if not pages:
+            pages.append([0, 0])
+        if x + w > page_size:
+            # новая полка
+            x, y, shelf = 0, y + shelf, 0
+        if y + h > page_size:
+            # новая страница
+            pages.append([0, 0])
+            page, x, y, shelf = page + 1, 0, 0, 0
+        places[name] = (page, x, y)
+        x += w
+        shelf = max(shelf, h)
+        pages[page][0] = max(pages[page][0], x)
+        pages[page][1] = max(pages[page][1], y + h)
+    return places, [tuple(p) for p in pages]
+
+
+def build_pages(specs, load, page_size=ATLAS_PAGE_SIZE):
+    """Нарезает кадры из листов прямо в страницы атласа.
+
+    specs: имя -> (лист, x, y, w, h) как у get_sprite; load(путь) -> Surface.
+    Возвращает (страницы, имя -> [страница, x, y, w, h]).
+    """
+    places, page_sizes = pack({name: spec[3:] for name, spec in specs.items()}, page_size)
+    pages = [pygame.Surface(size, pygame.SRCALPHA) for size in page_sizes]
+    sheets = {}
+    rects = {}
+    for name, (sheet, sx, sy, w, h) in specs.items():
+        if sheet not in sheets:
+            sheets[sheet] = load(sheet)
+        page, x, y = places[name]
+        pages[page].blit(sheets[sheet], (x, y), (sx * w, sy * h, w, h))
+        rects[name] = [page, x, y, w, h]
+    return pages, rects
+
+
+class Atlas:
+    """Кадры на нескольких общих поверхностях.
+
+    atlas["player/walk1"] — subsurface страницы: пиксели не копируются,
+    все спрайты живут в нескольких больших поверхностях.
+    """
+    def __init__(self, pages, rects):
+        self.pages = pages
+        self.rects = rects  # имя -> [страница, x, y, w, h]
+        self._views = {}
+
+    def __getitem__(self, name):
+        view = self._views.get(name)
+        if view is None:
+            page, x, y, w, h = self.rects[name]
+            view = self._views[name] = self.pages[page].subsurface((x, y, w, h))
+        return view
+
+    def __contains__(self, name):
+        return name in self.rects
+
+    def group(self, prefix):
+        """Кадры с именами «prefix/...»: короткое имя -> Surface"""
+        start = prefix + "/"
+        return {name[len(start):]: self[name] for name in self.rects if name.startswith(start)}
+
+    def bytes(self):
+        return sum(page.get_pitch() * page.get_height() for page in self.pages)
@@ -0,0 +1,236 @@
+"""Запекание картинок заранее: фоны и кадры спрайтов в готовом к отрисовке виде.
+
+    python3 bake.py          # запечь то, что изменилось
+    python3 bake.py --force  # запечь всё заново
+
+В BAKE_DIR пишутся:
+  * фоны, уже масштабированные до SCREEN_WIDTH x SCREEN_HEIGHT (сырые RGB);
+  * страницы атласа со всеми кадрами SPRITE_FRAMES из resources.py (сырые RGBA);
+  * manifest.json: для каждого результата — его файлы (размер, формат, хеш
+    содержимого), ключ (хеш исходников и параметров запекания) и время
+    изменения и размер исходников.
+Сырые пиксели читаются без декодирования PNG. Сама игра исходники не
+читает: свежесть проверяется по os.stat и хешу параметров. Если они не
+совпадают с манифестом, игра молча грузит исходные PNG.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import pygame
+
+from constants import BACKGROUNDS, SCREEN_WIDTH, SCREEN_HEIGHT, BAKE_DIR, ATLAS_PAGE_SIZE
+from atlas import build_pages
+
+BAKE_VERSION = 3
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _key(sources, params):
+    """Ключ результата: версия, параметры и содержимое всех исходных файлов"""
+    h = hashlib.sha1(_params_key(params).encode())
+    for path in sources:
+        h.update(_file_hash(path).encode())
+    return h.hexdigest()
+
+
+def _params_key(params):
+    return hashlib.sha1(json.dumps([BAKE_VERSION, params], sort_keys=True).encode()).hexdigest()
+
+
+def _source_stats(sources):
+    """Время изменения и размер исходников — дешёвая проверка свежести в игре"""
+    stats = {}
+    for path in sources:
+        st = os.stat(path)
+        stats[path] = [st.st_mtime_ns, st.st_size]
+    return stats
+
+
+def _output_path(name):
+    return os.path.join(BAKE_DIR, name)
+
+
+# === Манифест ===
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def read_manifest():
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            try:
+                with open(_output_path("manifest.json"), encoding="utf-8") as f:
+                    _manifest = json.load(f)
+            except (OSError, ValueError):
+                _manifest = {}
+            if _manifest.get("version") != BAKE_VERSION:
+                _manifest = {"version": BAKE_VERSION, "outputs": {}}
+        return _manifest
+
+
+def write_manifest(manifest):
+    path = _output_path("manifest.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _write_output(filename, data):
+    path = _output_path(filename)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return hashlib.sha1(data).hexdigest()
+
+
+def _read_surfaces(entry):
+    """Поверхности всех файлов результата (без convert) или None, если файл пропал или не той длины"""
+    surfaces = []
+    for out in entry["files"]:
+        w, h = out["size"]
+        try:
+            with open(_output_path(out["file"]), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != w * h * len(out["format"]):
+            return None
+        surfaces.append(pygame.image.frombuffer(data, (w, h), out["format"]))
+    return surfaces
+
+
+def _output_valid(entry):
+    # файлы на месте и не изменились с момента запекания
+    for out in entry["files"]:
+        try:
+            with open(_output_path(out["file"]), "rb") as f:
+                if hashlib.sha1(f.read()).hexdigest() != out["hash"]:
+                    return False
+        except OSError:
+            return False
+    return True
+
+
+# === Рецепты ===
+
+def _background_recipe(path, size):
+    name = "bg-" + os.path.splitext(os.path.basename(path))[0]
+    return name, [path], {"kind": "background", "source": path, "size": list(size)}
+
+
+def _atlas_recipe(specs):
+    sources = sorted({sheet for sheet, *_ in specs.values()})
+    params = {"kind": "atlas", "page_size": ATLAS_PAGE_SIZE,
+              "frames": {name: list(spec) for name, spec in specs.items()}}
+    return "atlas", sources, params
+
+
+def _bake_background(path, size):
+    surface = pygame.transform.scale(pygame.image.load(path), size)
+    return [surface], "RGB", {}
+
+
+def _bake_atlas(specs):
+    pages, rects = build_pages(specs, pygame.image.load)
+    return pages, "RGBA", {"frames": rects}
+
+
+def bake_all(force=False):
+    """Запечь все результаты; пересобираются только те, у которых сменился ключ"""
+    from resources import atlas_specs
+
+    if not BAKE_DIR:
+        return [], 0
+    recipes = []
+    for path in BACKGROUNDS:
+        size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        recipes.append(_background_recipe(path, size) + (lambda path=path, size=size: _bake_background(path, size),))
+    specs = atlas_specs()
+    recipes.append(_atlas_recipe(specs) + (lambda: _bake_atlas(specs),))
+
+    os.makedirs(BAKE_DIR, exist_ok=True)
+    manifest = read_manifest()
+    outputs = manifest["outputs"]
+    baked = []
+    for name, sources, params, bake in recipes:
+        key = _key(sources, params)
+        entry = outputs.get(name)
+        if not force and entry and entry["key"] == key and _output_valid(entry):
+            # содержимое то же; время изменения могло смениться (checkout, touch)
+            entry["stats"] = _source_stats(sources)
+            continue
+        surfaces, fmt, extra = bake()
+        files = []
+        for i, surface in enumerate(surfaces):
+            filename = (f"{name}-{i}" if len(surfaces) > 1 else name) + "." + fmt.lower()
+            files.append({
+                "file": filename,
+                "size": list(surface.get_size()),
+                "format": fmt,
+                "hash": _write_output(filename, pygame.image.tobytes(surface, fmt)),
+            })
+        entry = {
+            "key": key,
+            "params": _params_key(params),
+            "sources": sources,
+            "stats": _source_stats(sources),
+            "files": files,
+        }
+        entry.update(extra)
+        outputs[name] = entry
+        baked.append(name)
+    write_manifest(manifest)
+    return baked, len(recipes)
+
+
+# === Загрузка в игре ===
+
+def _entry(name, sources, params):
+    # без чтения исходников: только параметры и os.stat против манифеста
+    if not BAKE_DIR:
+        return None
+    entry = read_manifest()["outputs"].get(name)
+    if entry is None or entry["params"] != _params_key(params):
+        return None
+    try:
+        if _source_stats(sources) != entry["stats"]:
+            return None
+    except OSError:
+        return None
+    return entry
+
+
+def baked_image(path, size):
+    """Запечённый фон нужного размера (без convert) или None"""
+    if size is None:
+        return None
+    entry = _entry(*_background_recipe(path, size))
+    surfaces = entry and _read_surfaces(entry)
+    return surfaces[0] if surfaces else None
+
+
+def baked_atlas(specs):
+    """Запечённые страницы атласа (после convert_alpha) и прямоугольники кадров, или None"""
+    entry = _entry(*_atlas_recipe(specs))
+    pages = entry and _read_surfaces(entry)
+    if not pages:
+        return None
+    return [page.convert_alpha() for page in pages], entry["frames"]
+
+
+if __name__ == "__main__":
+    baked, total = bake_all(force="--force" in sys.argv[1:])
+    for name in baked:
+        print("baked", name)
+    print(f"{len(baked)} of {total} outputs rebaked -> {BAKE_DIR}")
@@ -0,0 +1,165 @@
+"""Пакетные прогоны уровней без окна на всех ядрах.
+
+    python3 batch_runner.py --levels 0 1 9 --seeds 0 1 2 --scripts runner gunner --out results.csv
+
+Каждая задача — (уровень, seed, сценарий управления); результаты
+собираются в одну таблицу (CSV и сводка в консоли).
+"""
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+RESULT_FIELDS = ("level", "seed", "script", "outcome", "frames", "death_s", "hp",
+                 "coins_spent", "diamonds_spent", "enemies_left", "boss_hp", "boss_phase", "wall_s")
+
+
+# === Сценарии управления: (session, controls, rng) -> меняют controls перед шагом ===
+
+def script_idle(session, controls, rng):
+    pass
+
+
+def script_runner(session, controls, rng):
+    # бежит вправо и подпрыгивает
+    controls.right = True
+    controls.jump = session.frames % 45 < 5
+
+
+def script_random(session, controls, rng):
+    if session.frames % 30 == 0:
+        controls.left = rng.random() < 0.25
+        controls.right = not controls.left and rng.random() < 0.8
+        controls.jump = rng.random() < 0.3
+        controls.shield = rng.random() < 0.1
+    if rng.random() < 0.02:
+        hb = session.player.hitbox
+        controls.shots.append((hb.centerx + rng.randint(-600, 600), hb.centery + rng.randint(-300, 300)))
+
+
+def script_gunner(session, controls, rng):
+    # бежит вправо и стреляет по ближайшему врагу (или боссу)
+    script_runner(session, controls, rng)
+    controls.shield = session.player.hp <= 3
+    if session.frames % 20:
+        return
+    hb = session.player.hitbox
+    targets = session.enemies + ([session.boss] if session.boss else [])
+    if targets:
+        t = min(targets, key=lambda e: abs(e.hitbox.centerx - hb.centerx) + abs(e.hitbox.centery - hb.centery))
+        if abs(t.hitbox.centerx - hb.centerx) < 900:
+            controls.shots.append(t.hitbox.center)
+
+
+SCRIPTS = {
+    "idle": script_idle,
+    "runner": script_runner,
+    "random": script_random,
+    "gunner": script_gunner,
+}
+
+
+def _init_worker():
+    # у процессов пула нет окна и звука: всё через dummy-драйверы SDL
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    # только видео (convert_alpha нужен display); без микшера звуки не декодируются
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+
+def run_job(job):
+    """Один прогон уровня; job = (уровень, seed, сценарий, макс. шагов, монеты, алмазы)"""
+    level_index, seed, script, max_steps, coins, diamonds = job
+    # импорт здесь: pygame и уровни нужны только в процессах пула
+    import sim_clock
+    from game_session import GameSession, InputState
+
+    random.seed(seed)  # враги и босс используют общий random
+    rng = random.Random(seed)
+    sim_clock.reset()
+    t = time.perf_counter()
+    session = GameSession(level_index, coins, diamonds)
+    controls = InputState()
+    control = SCRIPTS[script]
+    while session.outcome is None and session.frames < max_steps:
+        control(session, controls, rng)
+        session.step(controls)
+        controls.clear_actions()
+
+    player = session.player
+    boss = session.boss
+    return {
+        "level": level_index,
+        "seed": seed,
+        "script": script,
+        "outcome": session.outcome or "timeout",
+        "frames": session.frames,
+        "death_s": round(session.frames * session.step_ms / 1000, 2) if session.outcome == "dead" else "",
+        "hp": player.hp,
+        "coins_spent": session.shots_fired,
+        "diamonds_spent": diamonds + session.diamonds_collected - player.diamonds,
+        "enemies_left": len(session.enemies),
+        "boss_hp": boss.hp if boss else "",
+        "boss_phase": boss.phase + 1 if boss else "",
+        "wall_s": round(time.perf_counter() - t, 3),
+    }
+
+
+def run_batch(jobs, workers=None):
+    """Все задачи по процессам; результаты в порядке задач"""
+    # spawn, а не fork: процессы не наследуют состояние SDL родителя
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx,
+                             initializer=_init_worker) as pool:
+        return list(pool.map(run_job, jobs, chunksize=1))
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_table(rows):
+    widths = {k: max(len(k), *(len(str(r[k])) for r in rows)) for k in RESULT_FIELDS}
+    print("  ".join(k.ljust(widths[k]) for k in RESULT_FIELDS))
+    for r in rows:
+        print("  ".join(str(r[k]).ljust(widths[k]) for k in RESULT_FIELDS))
+
+
+if __name__ == "__main__":
+    from constants import LEVELS
+
+    parser = argparse.ArgumentParser(description="Пакетные прогоны уровней без окна")
+    parser.add_argument("--levels", type=int, nargs="*", default=list(range(len(LEVELS))),
+                        help="индексы уровней (с 0), по умолчанию все")
+    parser.add_argument("--seeds", type=int, nargs="*", default=[0, 1, 2])
+    parser.add_argument("--scripts", nargs="*", default=["runner", "gunner"], choices=sorted(SCRIPTS))
+    parser.add_argument("--steps", type=int, default=60 * 120, help="предел шагов на прогон")
+    parser.add_argument("--coins", type=int, default=20, help="монет на старте")
+    parser.add_argument("--diamonds", type=int, default=2, help="алмазов на старте")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="CSV с результатами")
+    args = parser.parse_args()
+    # неверный индекс иначе всплыл бы трассировкой из процесса пула
+    bad = [level for level in args.levels if level not in range(len(LEVELS))]
+    if bad:
+        parser.error(f"--levels: нет уровней {bad}, допустимо 0..{len(LEVELS) - 1}")
+
+    jobs = [(level, seed, script, args.steps, args.coins, args.diamonds)
+            for level in args.levels for seed in args.seeds for script in args.scripts]
+    t = time.perf_counter()
+    rows = run_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - t
+    print_table(rows)
+    frames = sum(r["frames"] for r in rows)
+    print(f"{len(rows)} runs, {frames} steps in {elapsed:.1f} s ({frames / elapsed:.0f} steps/s)", file=sys.stderr)
+    if args.out:
+        write_csv(rows, args.out)
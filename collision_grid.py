@@ -0,0 +1,87 @@
+import numpy as np
+
+from constants import TILE_SIZE
+
+
+class CollisionGrid:
+    """Равномерная сетка статических коллайдеров уровня.
+
+    Каждый прямоугольник регистрируется во всех ячейках, которые он задевает,
+    поэтому запрос «что касается этого прямоугольника» смотрит только
+    несколько соседних ячеек, а не весь список тайлов.
+    """
+    def __init__(self, rects=(), cell_size=TILE_SIZE):
+        self.cell_size = cell_size
+        self.rects = []
+        self.cells = {}  # (cx, cy) -> [индексы в self.rects]
+        # подвижные коллайдеры (верх платформ) — их мало, проверяем перебором
+        self.dynamic = []
+        for rect in rects:
+            self.add(rect)
+
+    def __iter__(self):
+        yield from self.rects
+        yield from self.dynamic
+
+    def __len__(self):
+        return len(self.rects) + len(self.dynamic)
+
+    def add(self, rect):
+        index = len(self.rects)
+        self.rects.append(rect)
+        xs, ys = self._cell_range(rect)
+        for cy in ys:
+            for cx in xs:
+                self.cells.setdefault((cx, cy), []).append(index)
+
+    def set_dynamic(self, rects):
+        self.dynamic = rects
+
+    def _cell_range(self, rect):
+        cs = self.cell_size
+        return (range(rect.left // cs, (rect.right - 1) // cs + 1),
+                range(rect.top // cs, (rect.bottom - 1) // cs + 1))
+
+    def query(self, rect):
+        """Все коллайдеры, пересекающие rect (в порядке добавления)"""
+        xs, ys = self._cell_range(rect)
+        found = set()
+        for cy in ys:
+            for cx in xs:
+                indices = self.cells.get((cx, cy))
+                if indices:
+                    found.update(indices)
+        rects = self.rects
+        hits = [rects[i] for i in sorted(found) if rects[i].colliderect(rect)]
+        hits.extend(r for r in self.dynamic if r.colliderect(rect))
+        return hits
+
+    def first(self, rect):
+        """Первый коллайдер, пересекающий rect, или None"""
+        hits = self.query(rect)
+        return hits[0] if hits else None
+
+    def occupancy(self):
+        """Карта занятых ячеек [строка, столбец] по статическим коллайдерам.
+
+        Нужна для дешёвых точечных проверок (снаряды): один индекс в массив
+        вместо обхода прямоугольников. Платформы сюда не входят.
+        """
+        if not self.rects:
+            return np.zeros((0, 0), dtype=bool)
+        cs = self.cell_size
+        cols = max(r.right for r in self.rects) // cs + 1
+        rows = max(r.bottom for r in self.rects) // cs + 1
+        grid = np.zeros((rows, cols), dtype=bool)
+        for rect in self.rects:
+            xs, ys = self._cell_range(rect)
+            grid[max(ys.start, 0):max(ys.stop, 0), max(xs.start, 0):max(xs.stop, 0)] = True
+        return grid
+
+    def collidepoint(self, point):
+        """Есть ли коллайдер, содержащий точку"""
+        cs = self.cell_size
+        for i in self.cells.get((int(point[0]) // cs, int(point[1]) // cs), ()):
+            if self.rects[i].collidepoint(point):
+                return True
+        return any(r.collidepoint(point) for r in self.dynamic)
@@ -1,11 +1,18 @@
-import pygame
-
 # Настройки окна
 SCREEN_WIDTH = 1600
 SCREEN_HEIGHT = 900
 TILE_SIZE = 64
 CHAR_SIZE = 128
 FPS = 60
+PROFILE_FRAMES = 300  # окно замеров профайлера кадров (F3)
+SIM_RATE = 60  # шагов симуляции в секунду (скорости в игре заданы «за шаг»)
+MAX_SIM_STEPS = 5  # максимум шагов догоняния за кадр
+CHUNK_TILES = 8  # размер чанка кэша тайлов (в тайлах по стороне)
+MERGE_COLLIDERS = True  # склеивать соседние тайлы коллизий в крупные прямоугольники
+MAX_PROJECTILES = 256  # живых снарядов одной стороны на уровне; лишние вытесняют самые старые
+LEVEL_CACHE_DIR = "assets/.levelcache"  # скомпилированные уровни (None — всегда читать TMX)
+BAKE_DIR = "assets/.baked"  # запечённые фоны и кадры (bake.py; None — всегда из PNG)
+STARTUP_LOG = "startup_times.jsonl"  # замеры запуска, строка на запуск (None — не писать)
 
 LEVELS = [
     "assets/level-1.tmx",
@@ -45,21 +52,33 @@ FON_MUSIC=[
 ]
 CURRENT_LEVEL = 0
 
-# Загружаем звуки
-SHOOT_SOUND = pygame.mixer.Sound("assets/music/shoot.mp3")
-HIT_SOUND = pygame.mixer.Sound("assets/music/damage2.mp3")
-ENEMY_DEATH_SOUND = pygame.mixer.Sound("assets/music/kill.mp3")
-LEVEL_COMPLETE_SOUND = pygame.mixer.Sound("assets/music/portal.mp3")
-PICKUP_SOUND = pygame.mixer.Sound("assets/music/selection.mp3")
-HEAL_SOUND = pygame.mixer.Sound("assets/music/heal.mp3")
+# Звуковые эффекты: только файлы — декодируются при первом использовании (sounds.py)
+SOUND_FILES = {
+    "shoot": "assets/music/shoot.mp3",
+    "hit": "assets/music/damage2.mp3",
+    "enemy_death": "assets/music/kill.mp3",
+    "level_complete": "assets/music/portal.mp3",
+    "pickup": "assets/music/selection.mp3",
+    "heal": "assets/music/heal.mp3",
+}
+SOUND_VOLUME = 2  # громкость эффектов
+SOUND_CACHE_DIR = "assets/.soundcache"  # декодированный PCM (None — всегда декодировать mp3)
+
+# Голоса эффектов: каналы микшера, закреплённые за группами
+SOUND_GROUPS = {"player": 4, "enemy": 6, "ui": 2}
+# эффект -> (группа, приоритет, мин. интервал между запусками в мс)
+SOUND_RULES = {
+    "shoot": ("player", 1, 70),
+    "hit": ("player", 2, 100),
+    "enemy_death": ("enemy", 2, 60),
+    "level_complete": ("ui", 5, 0),
+    "pickup": ("ui", 3, 50),
+    "heal": ("ui", 3, 50),
+}
+SOUND_CULL_MARGIN = 200  # эффекты дальше этого от краёв экрана (в пикселях) не запускаются
 
-# Громкость
-SHOOT_SOUND.set_volume(2)
-HIT_SOUND.set_volume(2)
-ENEMY_DEATH_SOUND.set_volume(2)
-LEVEL_COMPLETE_SOUND.set_volume(2)
-PICKUP_SOUND.set_volume(2)
-HEAL_SOUND.set_volume(2)
+IMAGE_CACHE_BYTES = 160 * 1024 * 1024  # бюджет кеша картинок (image_cache.py)
+ATLAS_PAGE_SIZE = 1024  # наибольшая сторона страницы атласа спрайтов
 
 LEVEL_QUIZ = [
 
@@ -1,41 +1,10 @@
 import pygame
 import math
 from constants import TILE_SIZE, CHAR_SIZE
+from text_cache import render_text
+from sim_clock import get_ticks
 import random
 
-class Projectile:
-    def __init__(self, x, y, vx, vy, color=(0,255,0), life=3000, image=None, size=8):
-        self.pos = pygame.Vector2(x, y)
-        self.v = pygame.Vector2(vx, vy)
-        self.color = color
-        self.spawn_time = pygame.time.get_ticks()
-        self.life = life
-        self.image = image
-        self.size = max(1, int(size))
-        if self.image:
-            # rect по центру изображения
-            self.rect = self.image.get_rect(center=(int(self.pos.x), int(self.pos.y)))
-        else:
-            # центрируем прямоугольник по позиции
-            self.rect = pygame.Rect(int(self.pos.x) - self.size//2, int(self.pos.y) - self.size//2, self.size, self.size)
-
-    def update(self, dt):
-        self.pos += self.v * dt
-        if self.image:
-            self.rect = self.image.get_rect(center=(int(self.pos.x), int(self.pos.y)))
-        else:
-            self.rect.center = (int(self.pos.x), int(self.pos.y))
-        return pygame.time.get_ticks() - self.spawn_time > self.life
-
-    def draw(self, surf, offset):
-        if self.image:
-            r = self.image.get_rect(center=(self.rect.centerx + offset[0], self.rect.centery + offset[1]))
-            surf.blit(self.image, r.topleft)
-        else:
-            r = self.rect.move(offset[0], offset[1])
-            pygame.draw.rect(surf, self.color, r)
-
-
 class Boss:
     """Босс — умный вирус с многофазной атакой и тактикой"""
     def __init__(self, x, y, sprites, hp=None):
@@ -72,7 +41,7 @@ class Boss:
         self.jump_charge = 0
 
     def update(self, player, tiles, projectiles):
-        now = pygame.time.get_ticks()
+        now = get_ticks()
         
         # === ФАЗЫ ===
         hp_ratio = self.hp / self.max_hp
@@ -95,8 +64,8 @@ class Boss:
         self.hitbox.y += int(self.vel_y)
         self.on_ground = False
         
-        for t in tiles:
-            if isinstance(t, pygame.Rect) and t.colliderect(self.hitbox):
+        for t in tiles.query(self.hitbox):
+            if t.colliderect(self.hitbox):
                 if self.vel_y > 0:
                     self.hitbox.bottom = t.top
                     self.vel_y = 0
@@ -145,8 +114,8 @@ class Boss:
             self.facing_right = side_dir > 0
         
         # избегаем застревания в стенах
-        for t in tiles:
-            if isinstance(t, pygame.Rect) and t.colliderect(self.hitbox):
+        for t in tiles.query(self.hitbox):
+            if t.colliderect(self.hitbox):
                 if dx_to_player > 0:
                     self.hitbox.right = t.left
                 else:
@@ -220,9 +189,8 @@ class Boss:
             vec = pygame.Vector2(1, 0)
         vec = vec.normalize()
         speed = 6 + self.phase
-        proj = Projectile(px, py, vec.x * speed, vec.y * speed, 
+        projectiles.spawn(px, py, vec.x * speed, vec.y * speed, 
                          color=(255, 100 + self.phase * 50, 20), size=8 * 4)
-        projectiles.append(proj)
 
     def _shoot_wave(self, px, py, player, projectiles):
         """Волна снарядов"""
@@ -231,27 +199,24 @@ class Boss:
             angle = (i / num_proj) * 2 * math.pi
             vx = math.cos(angle) * (5 + self.phase * 0.5)
             vy = math.sin(angle) * (5 + self.phase * 0.5)
-            proj = Projectile(px, py, vx, vy, color=(200, 80, 200), size=12)
-            projectiles.append(proj)
+            projectiles.spawn(px, py, vx, vy, color=(200, 80, 200), size=12)
 
     def _shoot_spiral(self, px, py, projectiles):
         """Спиральная атака"""
         num_proj = 8
-        time_offset = pygame.time.get_ticks() / 100.0
+        time_offset = get_ticks() / 100.0
         for i in range(num_proj):
             angle = (i / num_proj) * 2 * math.pi + time_offset
             vx = math.cos(angle) * 5.5
             vy = math.sin(angle) * 5.5
-            proj = Projectile(px, py, vx, vy, color=(100, 255, 200), size=14)
-            projectiles.append(proj)
+            projectiles.spawn(px, py, vx, vy, color=(100, 255, 200), size=14)
 
     def _shoot_sides(self, px, py, projectiles):
         """Боковая атака (слева и справа)"""
         for side in [-1, 1]:
             vx = side * 7
             vy = -2
-            proj = Projectile(px, py, vx, vy, color=(255, 200, 100), size=16)
-            projectiles.append(proj)
+            projectiles.spawn(px, py, vx, vy, color=(255, 200, 100), size=16)
 
     def draw(self, surf, offset):
         draw_pos = (self.rect.x + offset[0], self.rect.y + offset[1])
@@ -279,9 +244,7 @@ class Boss:
         pygame.draw.rect(surf, (255, 255, 255), (bar_x, bar_y, bar_width, bar_height), 2)
         
         # фаза-индикатор
-        phase_text = pygame.font.Font(None, 20).render(
-            f"Phase {self.phase + 1}", True, color
-        )
+        phase_text = render_text(f"Phase {self.phase + 1}", 20, color)
         surf.blit(phase_text, (bar_x, bar_y - 22))
 
     def damage(self, amount):
@@ -312,10 +275,7 @@ class Bacteria:
     def check_ground(self, tiles):
         """Проверяем, есть ли земля под врагом"""
         feet = pygame.Rect(self.hitbox.x, self.hitbox.bottom, self.hitbox.width, 2)
-        for t in tiles:
-            if isinstance(t, pygame.Rect) and t.colliderect(feet):
-                return True
-        return False
+        return tiles.first(feet) is not None
 
     # ...existing code...
     def can_move_forward(self, tiles, dx):
@@ -326,12 +286,12 @@ class Bacteria:
         # 1) проверка на стену непосредственно перед врагом (малый шаг)
         future_x = self.hitbox.copy()
         future_x.x += int(dir_sign * max(1, abs(dx)))
-        for t in tiles:
-            if isinstance(t, pygame.Rect) and t.colliderect(future_x):
-                # есть стена — проверяем, можно ли прыгнуть на неё на 1 тайл вверх
-                if t.bottom <= self.hitbox.bottom and t.bottom >= self.hitbox.bottom - TILE_SIZE:
-                    return True, "jump"
-                return False, None
+        t = tiles.first(future_x)
+        if t is not None:
+            # есть стена — проверяем, можно ли прыгнуть на неё на 1 тайл вверх
+            if t.bottom <= self.hitbox.bottom and t.bottom >= self.hitbox.bottom - TILE_SIZE:
+                return True, "jump"
+            return False, None
 
         # 2) проверка на пропасть: смотрим за 1 тайл вперед (последний безопасный тайл)
         stop_tiles_before_cliff = 1  # останавливаться на краю (1 тайл)
@@ -342,11 +302,7 @@ class Bacteria:
         tile_x = int(check_x_center) // TILE_SIZE
         cliff_check = pygame.Rect(tile_x * TILE_SIZE, self.hitbox.bottom, TILE_SIZE, TILE_SIZE)
 
-        has_ground = False
-        for t in tiles:
-            if isinstance(t, pygame.Rect) and t.colliderect(cliff_check):
-                has_ground = True
-                break
+        has_ground = tiles.first(cliff_check) is not None
 
         if not has_ground:
             return False, None  # впереди пропасть — не идём (останавливаемся на краю)
@@ -355,7 +311,7 @@ class Bacteria:
 # ...existing code...
 
     def update(self, player, tiles, projectiles):
-        now = pygame.time.get_ticks()
+        now = get_ticks()
         dx_to_player = (player.hitbox.centerx - self.hitbox.centerx)
         dy_to_player = abs(player.hitbox.centery - self.hitbox.centery)
         
@@ -370,8 +326,8 @@ class Bacteria:
         self.hitbox.y += int(self.vel_y)
         self.on_ground = False
         
-        for t in tiles:
-            if isinstance(t, pygame.Rect) and t.colliderect(self.hitbox):
+        for t in tiles.query(self.hitbox):
+            if t.colliderect(self.hitbox):
                 if self.vel_y > 0:  # падаем вниз
                     self.hitbox.bottom = t.top
                     self.vel_y = 0
@@ -396,22 +352,18 @@ class Bacteria:
                     self.on_ground = False
                 
                 # анимация ходьбы
-                self.anim_frame = (pygame.time.get_ticks() // 200) % 2
+                self.anim_frame = (get_ticks() // 200) % 2
                 current_img = self.sprites.get("walk1" if self.anim_frame == 0 else "walk2", self.sprites.get("idle"))
                 
                 # стрельба
                 if now - self.last_shot >= self.shoot_delay:
                     px = self.hitbox.centerx + direction * (TILE_SIZE//2 + 4)
                     py = self.hitbox.centery - 4
-                    proj = Projectile(px, py, direction * 0.35, 0, color=(0, 220, 0))
-                    projectiles.append(proj)
+                    projectiles.spawn(px, py, direction * 0.35, 0, color=(0, 220, 0))
                     self.last_shot = now
         
         # отражаем спрайт если смотрит влево
-        if not self.facing_right:
-            current_img = pygame.transform.flip(current_img, True, False)
-        
-        self.image = current_img
+        self.image = self.sprites.facing(current_img, self.facing_right)
         self.rect = self.image.get_rect(topleft=self.hitbox.topleft)
 
     def draw(self, surf, offset):
@@ -463,7 +415,7 @@ class Virus:
         self.aggro_distance_y = TILE_SIZE * 6   # по Y — ограничение агро
 
     def update(self, player, tiles, projectiles):
-        now = pygame.time.get_ticks()
+        now = get_ticks()
 
         dx_to_player = player.hitbox.centerx - self.hitbox.centerx
         dy_to_player = player.hitbox.centery - self.hitbox.centery
@@ -490,15 +442,14 @@ class Virus:
                 self.hitbox.x += int(self.patrol_speed * self.patrol_dir) * 2
 
             # при столкновении со стеной — разворачиваемся
-            for t in tiles:
-                if isinstance(t, pygame.Rect) and t.colliderect(self.hitbox):
-                    # откат и смена направления
-                    if self.patrol_dir > 0:
-                        self.hitbox.right = t.left
-                    else:
-                        self.hitbox.left = t.right
-                    self.patrol_dir *= -1
-                    break
+            t = tiles.first(self.hitbox)
+            if t is not None:
+                # откат и смена направления
+                if self.patrol_dir > 0:
+                    self.hitbox.right = t.left
+                else:
+                    self.hitbox.left = t.right
+                self.patrol_dir *= -1
 
             # визуал: смотрим по направлению патруля
             self.facing_right = self.patrol_dir > 0
@@ -517,15 +468,14 @@ class Virus:
             self.hitbox.y = int(self.start_y + move_y)
 
             # при столкновении со стеной — откатываемся и пробуем перелететь (простая логика: развернуться)
-            for t in tiles:
-                if isinstance(t, pygame.Rect) and t.colliderect(self.hitbox):
-                    if move_x > 0:
-                        self.hitbox.right = t.left
-                    else:
-                        self.hitbox.left = t.right
-                    # слегка отступаем и чуть меняем высоту, чтобы не застрять
-                    self.hitbox.y -= TILE_SIZE // 2
-                    break
+            t = tiles.first(self.hitbox)
+            if t is not None:
+                if move_x > 0:
+                    self.hitbox.right = t.left
+                else:
+                    self.hitbox.left = t.right
+                # слегка отступаем и чуть меняем высоту, чтобы не застрять
+                self.hitbox.y -= TILE_SIZE // 2
 
             self.facing_right = move_x > 0
 
@@ -543,19 +493,15 @@ class Virus:
                 proj_speed = 5.0
                 vx = vec.x * proj_speed
                 vy = vec.y * proj_speed
-                proj = Projectile(px, py, vx, vy, color=(150, 255, 120))
-                projectiles.append(proj)
+                projectiles.spawn(px, py, vx, vy, color=(150, 255, 120))
                 self.last_shot = now
 
         # Анимация (простая)
-        self.anim_frame = (pygame.time.get_ticks() // 200) % 2
+        self.anim_frame = (get_ticks() // 200) % 2
         current_img = self.sprites.get("walk1" if self.anim_frame == 0 else "walk2", self.sprites.get("idle"))
 
         # отражение спрайта по направлению движения
-        if not self.facing_right:
-            current_img = pygame.transform.flip(current_img, True, False)
-
-        self.image = current_img
+        self.image = self.sprites.facing(current_img, self.facing_right)
         self.rect = self.image.get_rect(topleft=self.hitbox.topleft)
 
 
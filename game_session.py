@@ -0,0 +1,616 @@
+import os
+import sys
+import time
+import random
+
+if __name__ == "__main__":
+    # самостоятельный запуск — без окна и звука
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from constants import *
+from sounds import voices, SHOOT_SOUND, ENEMY_DEATH_SOUND, LEVEL_COMPLETE_SOUND, PICKUP_SOUND, HEAL_SOUND
+from camera import Camera
+from player import Player
+from map_loader import load_map
+from tile_cache import TileLayerCache, DecorationBatch
+from text_cache import render_text, TextBlock
+from resources import get_resources
+from enemy import Bacteria, Virus, Boss
+from projectiles import ProjectilePool
+from spatial_hash import SpatialHash
+from sim_clock import Interpolator, advance, get_ticks
+from profiler import profiler
+
+
+class InputState:
+    """Управление на один шаг симуляции — вместо опроса клавиатуры и событий.
+
+    left/right/jump/shield — зажатые кнопки; shots (мировые координаты
+    целей выстрелов), interact (клавиша I) и answer (индекс ответа квиза) —
+    разовые действия, которые сбрасываются после шага (clear_actions).
+    """
+    def __init__(self, left=False, right=False, jump=False, shield=False,
+                 shots=(), interact=False, answer=None):
+        self.left = left
+        self.right = right
+        self.jump = jump
+        self.shield = shield
+        self.shots = list(shots)
+        self.interact = interact
+        self.answer = answer
+
+    def read_keys(self, keys):
+        """Зажатые кнопки из pygame.key.get_pressed()"""
+        self.left = bool(keys[pygame.K_a])
+        self.right = bool(keys[pygame.K_d])
+        self.jump = bool(keys[pygame.K_SPACE])
+        self.shield = bool(keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT])
+
+    def clear_actions(self):
+        self.shots = []
+        self.interact = False
+        self.answer = None
+
+
+# затемнение под квиз и табличку — одно на всю игру
+_dim_overlay = None
+
+
+def dim_overlay():
+    global _dim_overlay
+    if _dim_overlay is None:
+        _dim_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        _dim_overlay.set_alpha(200)
+        _dim_overlay.fill((0, 0, 0))
+    return _dim_overlay
+
+
+class GameSession:
+    """Состояние одного уровня и его симуляция.
+
+    step(controls) — один фиксированный шаг; окно, события pygame и
+    отрисовка не нужны (draw() вызывается, только если надо показать кадр).
+    Когда уровень закончился, outcome становится "complete" или "dead".
+    """
+    def __init__(self, current_level=0, saved_coins=0, saved_diamonds=0, background=None):
+        self.current_level = current_level
+        self.background = background
+        self.frames = 0  # сделано шагов симуляции
+        # статистика для прогонов без окна
+        self.shots_fired = 0
+        self.coins_collected = 0
+        self.diamonds_collected = 0
+        self.step_ms = 1000.0 / SIM_RATE
+
+        res = get_resources()
+        self.resources = res
+        self.level = level = load_map(LEVELS[current_level])
+        self.platforms = level.platforms
+        self.all_tiles = level.colliders
+        self.traps = level.hazards
+        self.water_rects = level.water_rects
+        self.quicksand_rects = level.quicksand_rects
+        self.info_objects = level.signs  # список: {"rect": Rect, "text": str}
+        self.exit_portal = level.exit_portal
+
+        # что появляется на уровне при старте — в компактном виде, для быстрого возрождения
+        self._spawns = []  # (класс, x, y, спрайты, hp)
+        for eo in level.enemies:
+            name = eo.get("name", "").lower()
+            hp_val = eo.get("hp", None)
+            if name == "bacteria":
+                self._spawns.append((Bacteria, eo["x"], eo["y"] - TILE_SIZE, res.bacteria_sprites, hp_val))
+            elif name == "virus":
+                self._spawns.append((Virus, eo["x"], eo["y"] - TILE_SIZE, res.virus_sprites, hp_val))
+            elif name == "boss":
+                self._spawns.append((Boss, eo["x"], eo["y"] - 256, res.boss_sprites, hp_val))
+        self._platform_starts = [(p.rect.x, p.rect.y, p.offset, p.forward) for p in self.platforms]
+
+        # снаряды гаснут о стены уровня; число живых ограничено
+        self.enemy_projectiles = ProjectilePool(limit=MAX_PROJECTILES, terrain=level.solid_cells)
+        self.player_projectiles = ProjectilePool(limit=MAX_PROJECTILES, terrain=level.solid_cells)
+        self.target_hash = SpatialHash()  # враги и босс для попаданий снарядов игрока
+        self._render = None  # кэши отрисовки; строятся при первом draw()
+        self._reset(saved_coins, saved_diamonds)
+
+    def _reset(self, coins, diamonds):
+        """Всё, что меняется за время жизни игрока, — в начальное состояние"""
+        res = self.resources
+        self.outcome = None
+
+        # === Переменные для квиза ===
+        self.quiz_active = False
+        self.quiz_question = None
+        self.quiz_buttons = []  # кнопки для выбора ответа
+        self.quiz_correct_idx = -1
+
+        # Info window state
+        self.info_active = False
+        self.info_text = ""
+        self.info_block = None  # свёрстанный текст открытой таблички
+
+        self.player = Player(100, 300, self.level.pixel_height, res.player_sprites)
+        self.player.coins = int(coins)
+        self.player.diamonds = int(diamonds)
+        self.camera = Camera()
+        self.proj_img1 = res.proj_img1
+
+        self.enemies = []
+        self.boss = None
+        for cls, x, y, sprites, hp in self._spawns:
+            if cls is Boss:
+                self.boss = Boss(x, y, sprites, hp=hp)
+            else:
+                self.enemies.append(cls(x, y, sprites, hp=hp))
+
+        for platform, (x, y, offset, forward) in zip(self.platforms, self._platform_starts):
+            platform.rect.topleft = (x, y)
+            platform.offset = offset
+            platform.forward = forward
+            platform.last_move = pygame.Vector2(0, 0)
+
+        # собранные предметы просто удаляются из списка — исходный список уровня цел
+        self.collectibles = list(self.level.collectibles)
+        self.enemy_projectiles.clear()
+        self.player_projectiles.clear()
+        self.interp = Interpolator()
+
+    def respawn(self, coins=None, diamonds=None):
+        """Возрождение на этом же уровне: без диска, pytmx и перезапуска музыки"""
+        player = self.player
+        self._reset(player.coins if coins is None else coins,
+                    player.diamonds if diamonds is None else diamonds)
+
+    # === Управление ===
+
+    def _shoot(self, world_x, world_y):
+        player = self.player
+        player.coins -= 1  # стрельба стоит 1 монету
+        self.shots_fired += 1
+        px = player.hitbox.centerx
+        py = player.hitbox.centery
+        vec = pygame.Vector2(world_x - px, world_y - py)
+        if vec.length() == 0:
+            vec = pygame.Vector2(1, 0)
+        vec = vec.normalize()
+        speed = 8.0
+        vx = vec.x * speed
+        vy = vec.y * speed
+        self.player_projectiles.spawn(px, py, vx, vy, color=(255,220,80), life=3000, image=self.proj_img1)
+        SHOOT_SOUND.play()
+
+    def _toggle_info(self):
+        # переключение окна информации, если рядом с любой табличкой
+        toggled = False
+        for info in self.info_objects:
+            # расширяем область для удобства взаимодействия
+            if self.player.hitbox.colliderect(info["rect"].inflate(24, 24)):
+                # если уже открыто — закрыть; иначе открыть с текстом из объекта
+                if self.info_active and self.info_text == info["text"]:
+                    self.info_active = False
+                    self.info_text = ""
+                else:
+                    self.info_active = True
+                    self.info_text = info["text"] or ""
+                self.info_block = None
+                toggled = True
+                break
+        # если не рядом с табличкой и окно открыто — закрыть
+        if not toggled and self.info_active:
+            self.info_active = False
+            self.info_text = ""
+            self.info_block = None
+
+    def quiz_button_at(self, pos):
+        """Индекс ответа под точкой экрана (для клика мышью) или None"""
+        for btn in self.quiz_buttons:
+            if btn["rect"].collidepoint(pos):
+                return btn["index"]
+        return None
+
+    def _apply_actions(self, controls):
+        player = self.player
+        if self.quiz_active:
+            if controls.answer is not None:
+                # проверяем ответ
+                if controls.answer == self.quiz_correct_idx:
+                    # верный ответ — переходим на следующий уровень
+                    LEVEL_COMPLETE_SOUND.play()
+                    self.outcome = "complete"
+                else:
+                    # неверный ответ — отнимаем 1 hp
+                    player.hp -= 1
+                    self.quiz_active = False
+                    self.quiz_question = None
+            return
+        for world_x, world_y in controls.shots:
+            if player.coins > 0:
+                self._shoot(world_x, world_y)
+        if controls.interact:
+            self._toggle_info()
+
+    # === Симуляция ===
+
+    def step(self, controls):
+        """Один шаг симуляции (1/SIM_RATE секунды игрового времени)"""
+        if self.outcome is not None:
+            return self.outcome
+        advance(self.step_ms)
+        self.frames += 1
+        self._apply_actions(controls)
+        if self.outcome is not None:
+            return self.outcome
+
+        dt = 1  # один шаг симуляции
+        player = self.player
+        # эффекты за пределами экрана (с запасом) не запускаются
+        voices.set_view(-self.camera.offset_x, -self.camera.offset_y, SCREEN_WIDTH, SCREEN_HEIGHT)
+        enemies = self.enemies
+        platforms = self.platforms
+        all_tiles = self.all_tiles
+        self.interp.snapshot([player, *enemies, *platforms] + ([self.boss] if self.boss else []))
+        t = profiler.now()
+
+        # Обновляем снаряды игрока
+        spent = self.player_projectiles.update(dt)
+        # все пары (снаряд, цель) разом: враги в порядке списка, босс последним
+        boss = self.boss
+        self.target_hash.rebuild(enemies + [boss] if boss else enemies)
+        used = set()  # снаряды, уже попавшие в цель
+        killed = set()
+        for i, target in self.target_hash.hits(self.player_projectiles):
+            if i in used:
+                continue
+            if target in killed:
+                continue  # враг убит предыдущим снарядом этого кадра
+            if target is boss:
+                # Попадание в босса
+                try:
+                    died = boss.damage(getattr(player, "projectile_damage", 1))
+                    if died:
+                        self.boss = None
+                        LEVEL_COMPLETE_SOUND.play()
+                        self.outcome = "complete"
+                        return self.outcome
+                except Exception:
+                    pass
+            else:
+                dmg = getattr(player, "projectile_damage", 1)
+                try:
+                    died = target.damage(dmg)
+                except Exception:
+                    target.hp -= dmg
+                    died = target.hp <= 0
+                if died:
+                    killed.add(target)
+                    try:
+                        ENEMY_DEATH_SOUND.play(target.hitbox.center)
+                        enemies.remove(target)
+                    except ValueError:
+                        pass
+            spent[i] = True
+            used.add(i)
+        self.player_projectiles.remove(spent)
+        t = profiler.lap("projectiles", t)
+
+        # 1. Обновляем платформы
+        for platform in platforms:
+            platform.update()
+
+        # 2. Обновляем подвижные коллайдеры (верх платформ) в сетке коллизий
+        all_tiles.set_dynamic([
+            pygame.Rect(platform.rect.x, platform.rect.y - 1, platform.rect.width, 2)
+            for platform in platforms
+        ])
+        t = profiler.lap("platforms", t)
+
+        # 3. Вычисляем состояние (вода/пески)
+        feet = pygame.Rect(player.hitbox.x, player.hitbox.bottom, player.hitbox.width, 2)
+        in_water = any(w.colliderect(feet) for w in self.water_rects) if self.water_rects else False
+        in_quicksand = any(q.colliderect(feet) for q in self.quicksand_rects) if self.quicksand_rects else False
+
+        player.update(all_tiles, self.traps, controls, in_water, in_quicksand)
+        t = profiler.lap("player", t)
+
+        # Обновляем врагов
+        for e in enemies:
+            e.update(player, all_tiles, self.enemy_projectiles)
+            # контакт враг - игрок (но НЕ если активна защита)
+            if e.hitbox.colliderect(player.hitbox) and not player.shield_active:
+                now = get_ticks()
+                if now - player.last_hit_time > player.invincible_delay:
+                    player.hp -= 1
+                    player.last_hit_time = now
+                    player.vel_y = -8  # отскок вверх
+
+        if boss:
+            boss.update(player, all_tiles, self.enemy_projectiles)
+            # контакт босс - игрок
+            if boss.hitbox.colliderect(player.hitbox) and not player.shield_active:
+                now = get_ticks()
+                if now - player.last_hit_time > player.invincible_delay:
+                    player.hp -= 2  # босс наносит больше урона
+                    player.last_hit_time = now
+                    player.vel_y = -10
+        t = profiler.lap("enemies", t)
+
+        # Обновляем снаряды врагов
+        spent = self.enemy_projectiles.update(dt)
+        hits = self.enemy_projectiles.collide(player.hitbox)
+        if hits.any() and not player.shield_active:
+            # со щитом урона нет, но попавшие снаряды всё равно исчезают
+            now = get_ticks()
+            if now - player.last_hit_time > player.invincible_delay:
+                player.hp -= 1
+                player.last_hit_time = now
+        self.enemy_projectiles.remove(spent | hits)
+        t = profiler.lap("projectiles", t)
+
+        self._pick_up()
+        t = profiler.lap("pickups", t)
+
+        # 4. Применяем движение платформ
+        for platform in platforms:
+            on_platform = (
+                player.hitbox.bottom >= platform.rect.top - 5 and
+                player.hitbox.bottom <= platform.rect.top + 15 and
+                player.hitbox.left < platform.rect.right and
+                player.hitbox.right > platform.rect.left and
+                player.vel_y >= 0
+            )
+            if on_platform:
+                player.hitbox.x += int(platform.last_move.x)
+                player.hitbox.y += int(platform.last_move.y)
+                player.rect = player.image.get_rect(midbottom=player.hitbox.midbottom)
+        profiler.lap("platforms", t)
+
+        # 5. Проверяем выход из уровня
+        # Проверка столкновения с Exit (если не в квизе)
+        if self.exit_portal and not self.quiz_active:
+            if player.hitbox.colliderect(self.exit_portal):
+                self._open_quiz()
+
+        # 6. Проверяем смерть
+        if player.hp <= 0:
+            self.outcome = "dead"
+            return self.outcome
+
+        self.camera.update(player)
+        return None
+
+    def _pick_up(self):
+        # --- Подбор коллектиблов ---
+        player = self.player
+        for c in self.collectibles[:]:
+            if c["rect"].colliderect(player.hitbox):
+                if c["type"] == "coin":
+                    player.coins += c["value"] *10
+                    self.coins_collected += c["value"] *10
+                    PICKUP_SOUND.play()
+                elif c["type"] == "diamond":
+                    player.diamonds += c["value"]
+                    self.diamonds_collected += c["value"]
+                    PICKUP_SOUND.play()
+                elif c["type"] == "medkit":
+                    HEAL_SOUND.play()
+                    # восстановление 1 HP (с учётом max_hp, если есть)
+                    max_hp = getattr(player, "max_hp", None)
+                    if max_hp is None:
+                        # если нет max_hp, ограничим максимум любым числом (например 10)
+                        max_hp = 10
+                    player.hp = min(player.hp + 1, max_hp)
+                elif c["type"] == "ammo":
+                    # при подборе — меняем спрайт снаряда игрока и увеличиваем урон в 2 раза
+                    PICKUP_SOUND.play()
+                    self.proj_img1 = self.resources.proj_img2
+                    player.projectile_damage = int(getattr(player, "projectile_damage", 1) * 2)
+                    # если есть gid — используем изображение тайла для снаряда
+                    if c.get("gid") is not None:
+                        img = c.get("image")
+                        if img:
+                            # уменьшить до размера пули
+                            player.proj_img1 = pygame.transform.scale(img, (12, 12))
+                    else:
+                        # fallback: используем дефолт proj_img
+                        player.proj_img1 = self.proj_img1
+                try:
+                    self.collectibles.remove(c)
+                except ValueError:
+                    pass
+
+    def _open_quiz(self):
+        # активируем квиз
+        self.quiz_active = True
+        # берём вопрос уровня
+        if self.current_level < len(LEVEL_QUIZ):
+            self.quiz_question = LEVEL_QUIZ[self.current_level]
+            self.quiz_correct_idx = self.quiz_question.get("correct", -1)
+            # создаём кнопки для ответов
+            self.quiz_buttons = []
+            btn_width = 300
+            btn_height = 60
+            btn_x = SCREEN_WIDTH // 2 - btn_width // 2
+            for i, answer in enumerate(self.quiz_question.get("answers", [])):
+                btn_y = 350 + i * 80
+                self.quiz_buttons.append({
+                    "rect": pygame.Rect(btn_x, btn_y, btn_width, btn_height),
+                    "text": answer,
+                    "index": i
+                })
+
+    # === Отрисовка ===
+
+    def _build_render_caches(self):
+        # --- Кэш тайловых слоёв: запекаем один раз, рисуем только видимые чанки ---
+        level = self.level
+        self._render = {
+            "tiles": TileLayerCache(tile for _, layer_tiles in level.tile_layers for tile in layer_tiles),
+            "water": TileLayerCache(level.water_tiles) if level.water_tiles else None,
+            "quicksand": TileLayerCache(level.quicksand_tiles) if level.quicksand_tiles else None,
+            "decorations": DecorationBatch(level.decorations),
+        }
+
+    def draw(self, screen, alpha=1.0):
+        """Кадр в промежуточный момент между двумя последними шагами (alpha — доля шага)"""
+        if self._render is None:
+            self._build_render_caches()
+        caches = self._render
+        player = self.player
+        interp = self.interp
+
+        # между шагами симуляции: камера и объекты в промежуточном положении
+        interp.alpha = alpha
+        view = interp.view(self.camera, player)
+        t = profiler.now()
+        if self.background is not None:
+            screen.blit(self.background, (0, 0))
+        else:
+            screen.fill((0, 0, 0))
+
+        caches["tiles"].draw(screen, view)
+        t = profiler.lap("tiles", t)
+
+        for platform in self.platforms:
+            platform.draw(screen, interp.offset(platform, view))
+
+        player_offset = interp.offset(player, view)
+        screen.blit(player.image, (player.rect.x + player_offset[0], player.rect.y + player_offset[1]))
+        for e in self.enemies:
+            e.draw(screen, interp.offset(e, view))
+        if self.boss:
+            self.boss.draw(screen, interp.offset(self.boss, view))
+
+        # Рисуем снаряды врагов
+        self.enemy_projectiles.draw(screen, view, alpha)
+        self.player_projectiles.draw(screen, view, alpha)
+
+        # Статические декорации (tile-объекты): только попавшие в кадр, одним blits
+        caches["decorations"].draw(screen, view)
+
+        # Рисуем текущие (не собранные) коллектиблы
+        for c in self.collectibles:
+            if c.get("gid") is not None:
+                img = c.get("image")
+                if img:
+                    draw_x, draw_y = c.get("draw", (c["rect"].x, c["rect"].y))
+                    screen.blit(img, (draw_x + view[0], draw_y + view[1]))
+            else:
+                # если без gid, рисуем простым прямоугольником (на случай)
+                screen.fill((255, 215, 0), (c["rect"].x + view[0], c["rect"].y + view[1], c["rect"].width, c["rect"].height))
+
+        t = profiler.lap("objects", t)
+
+        # Слой воды (рисовать поверх игрока)
+        if caches["water"] is not None:
+            caches["water"].draw(screen, view)
+
+        # Слой песков (если хотите видеть их поверх/под игроком)
+        if caches["quicksand"] is not None:
+            caches["quicksand"].draw(screen, view)
+        t = profiler.lap("tiles", t)
+
+        self._draw_hud(screen)
+        if self.quiz_active and self.quiz_question:
+            self._draw_quiz(screen)
+        if self.info_active and self.info_text:
+            self._draw_info(screen)
+        profiler.lap("hud", t)
+
+    def _draw_hud(self, screen):
+        player = self.player
+        # Полоска маны (щита)
+        mana_bar_x = 10
+        mana_bar_y = 140
+        mana_bar_width = 200
+        mana_bar_height = 18
+        # фон
+        pygame.draw.rect(screen, (40, 40, 40), (mana_bar_x, mana_bar_y, mana_bar_width, mana_bar_height))
+        # заполнение
+        mana_filled = int(mana_bar_width * max(0.0, min(1.0, player.mana)))
+        pygame.draw.rect(screen, (80, 170, 255), (mana_bar_x, mana_bar_y, mana_filled, mana_bar_height))
+        # рамка
+        pygame.draw.rect(screen, (200, 200, 200), (mana_bar_x, mana_bar_y, mana_bar_width, mana_bar_height), 2)
+        # подпись
+        status = "Shield: ON" if player.shield_active else "Shield: OFF"
+        mana_text = render_text(f"{status}  ({player.diamonds} diamonds)", 24, (180, 220, 255))
+        screen.blit(mana_text, (mana_bar_x, mana_bar_y - 22))
+
+        for i in range(player.hp):
+            screen.blit(self.resources.tile_heart, (10 + i * 40, 10))
+
+        # Счётчики коллектиблов
+        coin_text = render_text(f"Антитела: {player.coins}", 36, (255, 215, 0))
+        diamond_text = render_text(f"Имунитет: {player.diamonds}", 36, (0, 200, 255))
+        screen.blit(coin_text, (10, 60))
+        screen.blit(diamond_text, (10, 100))
+
+        # Номер уровня
+        level_text = render_text(f"Уровень {self.current_level + 1}/{len(LEVELS)}", 36, (255, 255, 255))
+        screen.blit(level_text, (SCREEN_WIDTH - 300, 10))
+
+    def _draw_quiz(self, screen):
+        quiz_question = self.quiz_question
+        # полупрозрачная подложка
+        screen.blit(dim_overlay(), (0, 0))
+
+        # заголовок
+        title = render_text(f"Уровень: {quiz_question.get('level', 'Unknown')}", 48, (255, 255, 0))
+        screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 50))
+
+        # вопрос
+        question_lines = []
+        q_text = quiz_question.get("question", "")
+        for line in q_text.split("\n"):
+            question_lines.append(render_text(line, 36, (255, 255, 255)))
+
+        q_y = 150
+        for line in question_lines:
+            screen.blit(line, (SCREEN_WIDTH // 2 - line.get_width() // 2, q_y))
+            q_y += 40
+
+        # кнопки ответов
+        for btn in self.quiz_buttons:
+            color = (0, 200, 0) if btn["rect"].collidepoint(pygame.mouse.get_pos()) else (100, 100, 200)
+            pygame.draw.rect(screen, color, btn["rect"])
+            pygame.draw.rect(screen, (255, 255, 255), btn["rect"], 3)
+
+            btn_text = render_text(btn["text"], 28, (255, 255, 255))
+            screen.blit(btn_text, (btn["rect"].centerx - btn_text.get_width() // 2,  btn["rect"].centery - btn_text.get_height() // 2))
+
+    def _draw_info(self, screen):
+        screen.blit(dim_overlay(), (0, 0))
+        # рамка
+        box_w = SCREEN_WIDTH - 240
+        box_h = SCREEN_HEIGHT - 240
+        box_x = 120
+        box_y = 120
+        pygame.draw.rect(screen, (18, 18, 28), (box_x, box_y, box_w, box_h))
+        pygame.draw.rect(screen, (190, 190, 230), (box_x, box_y, box_w, box_h), 3)
+        # текст с переносом: верстается один раз при открытии таблички
+        if self.info_block is None:
+            self.info_block = TextBlock(self.info_text, box_w - 40, 36, (230, 230, 230), 34)
+        self.info_block.draw(screen, (box_x + 20, box_y + 20))
+        hint = render_text("Нажмите I чтобы закрыть", 20, (180, 180, 180))
+        screen.blit(hint, (box_x + box_w - hint.get_width() - 12, box_y + box_h - 28))
+
+
+if __name__ == "__main__":
+    # Прогон уровня без окна со случайным управлением: python3 game_session.py [уровень] [шагов]
+    level_index = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    max_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    random.seed(0)
+    session = GameSession(level_index, saved_coins=50, saved_diamonds=2)
+    controls = InputState(right=True)
+    t = time.perf_counter()
+    while session.outcome is None and session.frames < max_steps:
+        if session.frames % 30 == 0:
+            controls.jump = random.random() < 0.3
+            controls.shield = random.random() < 0.1
+        session.step(controls)
+    elapsed = time.perf_counter() - t
+    print(f"level {level_index + 1}: {session.frames} steps in {elapsed:.2f} s "
+          f"({session.frames / elapsed:.0f} steps/s), outcome={session.outcome}, hp={session.player.hp}")
@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+
+import pygame
+
+from constants import IMAGE_CACHE_BYTES
+from bake import baked_image
+
+# Все картинки игры (фоны, листы спрайтов, тайлсеты) загружаются через один кеш.
+# Ключ — путь и то, что с картинкой сделано после декодирования:
+#   convert: None (как в файле), "convert" (формат экрана), "alpha" (convert_alpha)
+#   size: None или (ширина, высота) после transform.scale
+# Суммарный размер ограничен IMAGE_CACHE_BYTES, вытесняются давно не нужные.
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+class ImageCache:
+    def __init__(self, budget=IMAGE_CACHE_BYTES):
+        self.budget = budget
+        self.entries = OrderedDict()  # (путь, convert, size) -> Surface
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0  # сколько раз файл действительно декодировался
+        self.baked = 0  # сколько раз взят готовый результат bake.py
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _source(self, path, size):
+        # ближайшая уже готовая заготовка: масштабированная без convert или исходная
+        for key in ((path, None, size), (path, None, None)):
+            surface = self.entries.get(key)
+            if surface is not None:
+                return surface, key[2]
+        return None, None
+
+    def load(self, path, convert=None, size=None):
+        """Картинка из кеша или загруженная сейчас. convert/convert_alpha нужен display"""
+        size = tuple(size) if size else None
+        key = (path, convert, size)
+        with self._lock:
+            surface = self.entries.get(key)
+            if surface is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return surface
+            self.misses += 1
+            surface, done_size = self._source(path, size)
+
+        # чтение, декодирование и преобразования — без блокировки (фоновая предзагрузка)
+        loaded_from = None
+        if surface is None:
+            surface = baked_image(path, size)
+            if surface is not None:
+                done_size = size
+                loaded_from = "baked"
+            else:
+                surface = pygame.image.load(path)
+                loaded_from = "decode"
+        if size and done_size != size:
+            surface = pygame.transform.scale(surface, size)
+        if convert == "convert":
+            surface = surface.convert()
+        elif convert == "alpha":
+            surface = surface.convert_alpha()
+
+        with self._lock:
+            if loaded_from == "baked":
+                self.baked += 1
+            elif loaded_from == "decode":
+                self.decodes += 1
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= surface_bytes(old)
+            if convert is not None:
+                # заготовка без convert (её кладёт предзагрузка) больше не нужна:
+                # одна картинка не должна занимать бюджет дважды
+                raw = self.entries.pop((path, None, size), None)
+                if raw is not None:
+                    self.bytes -= surface_bytes(raw)
+            self.entries[key] = surface
+            self.bytes += surface_bytes(surface)
+            self._trim(keep=key)
+        return surface
+
+    def _trim(self, keep):
+        while self.bytes > self.budget and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            if key == keep:
+                self.entries.move_to_end(key)
+                continue
+            self.bytes -= surface_bytes(self.entries.pop(key))
+            self.evictions += 1
+
+    def cached(self, path, convert=None, size=None):
+        return (path, convert, tuple(size) if size else None) in self.entries
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "decodes": self.decodes,
+            "baked": self.baked,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
+
+    def summary(self):
+        """Строка для оверлея F3: попадания, загрузки и занятая часть бюджета"""
+        s = self.stats()
+        mb = 1024 * 1024
+        return (f"hits {s['hits']}  misses {s['misses']}  decodes {s['decodes']}  baked {s['baked']}  "
+                f"evictions {s['evictions']}  {s['bytes'] / mb:.0f}/{self.budget / mb:.0f} MB")
+
+
+images = ImageCache()
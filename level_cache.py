@@ -0,0 +1,413 @@
+"""Компилятор уровней Tiled в компактный бинарный формат.
+
+Артефакт уровня (assets/.levelcache/<имя>.lvl) содержит:
+  * заголовок: магия, версия формата, ключ (хеш TMX и TSX), длина метаданных;
+  * метаданные в JSON: размеры карты, тайлсеты, порядок слоёв, таблица объектов;
+  * массивы, выровненные по 4 байта: сетки gid тайловых слоёв (uint32)
+    и таблицы прямоугольников коллизий (int32 x, y, w, h).
+Массивы читаются через mmap без копирования, XML при этом не разбирается.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+
+import pygame
+import pytmx
+from constants import LEVELS, LEVEL_CACHE_DIR
+from image_cache import images
+
+MAGIC = b"LVLC"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sI20sI")  # магия, версия, ключ, длина метаданных
+
+# слои, для которых в артефакт пишутся готовые прямоугольники тайлов
+RECT_TABLE_LAYERS = ("ground", "sand", "quicksand", "traps")
+
+# биты отражения в gid Tiled
+FLIP_H = 0x80000000
+FLIP_V = 0x40000000
+FLIP_D = 0x20000000
+GID_MASK = 0x1FFFFFFF
+
+_TILESET_SOURCE_RE = re.compile(rb'<tileset[^>]*\ssource="([^"]+)"')
+
+
+def cache_path(tmx_filename):
+    name = os.path.splitext(os.path.basename(tmx_filename))[0]
+    return os.path.join(LEVEL_CACHE_DIR, name + ".lvl")
+
+
+def source_key(tmx_filename):
+    """Хеш содержимого TMX и всех внешних тайлсетов (TSX)"""
+    h = hashlib.sha1()
+    h.update(struct.pack("<I", FORMAT_VERSION))
+    with open(tmx_filename, "rb") as f:
+        data = f.read()
+    h.update(data)
+    base = os.path.dirname(tmx_filename)
+    for source in _TILESET_SOURCE_RE.findall(data):
+        tsx_path = os.path.join(base, source.decode("utf-8"))
+        try:
+            with open(tsx_path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(source)
+    return h.digest()
+
+
+# === Компиляция ===
+
+def _raw_gid_table(tmx_data):
+    """gid pytmx -> исходный gid Tiled с битами отражения"""
+    table = {0: 0}
+    for (tiled_gid, flags), value in tmx_data.imagemap.items():
+        if not tiled_gid:
+            continue  # служебная запись pytmx для пустого тайла
+        gid = value[0]
+        raw = tiled_gid
+        if flags.flipped_horizontally:
+            raw |= FLIP_H
+        if flags.flipped_vertically:
+            raw |= FLIP_V
+        if flags.flipped_diagonally:
+            raw |= FLIP_D
+        table[gid] = raw
+    return table
+
+
+def _json_value(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def compile_level(tmx_filename, out_path=None):
+    """Разбирает TMX (без загрузки картинок) и пишет бинарный артефакт"""
+    out_path = out_path or cache_path(tmx_filename)
+    key = source_key(tmx_filename)
+    tmx_data = pytmx.TiledMap(tmx_filename)
+    raw_gid = _raw_gid_table(tmx_data)
+    base = os.path.dirname(tmx_filename)
+
+    sections = []  # (bytes) в порядке записи
+    offset = 0
+
+    def add_section(data):
+        nonlocal offset
+        start = offset
+        sections.append(data)
+        offset += len(data)
+        return start
+
+    layers = []
+    rect_tables = {}
+    for layer in tmx_data.visible_layers:
+        name = getattr(layer, "name", "") or ""
+        if isinstance(layer, pytmx.TiledTileLayer):
+            grid = [0] * (layer.width * layer.height)
+            rects = []
+            for x, y, gid in layer:
+                if gid:
+                    grid[y * layer.width + x] = raw_gid.get(gid, 0)
+                    rects.append((x * tmx_data.tilewidth, y * tmx_data.tileheight,
+                                  tmx_data.tilewidth, tmx_data.tileheight))
+            layers.append({
+                "kind": "tiles", "name": name,
+                "width": layer.width, "height": layer.height,
+                "gids": add_section(struct.pack("<%dI" % len(grid), *grid)),
+            })
+            lname = name.lower()
+            if lname in RECT_TABLE_LAYERS and rects:
+                flat = [v for r in rects for v in r]
+                rect_tables.setdefault(lname, []).append(
+                    (add_section(struct.pack("<%di" % len(flat), *flat)), len(rects)))
+        elif isinstance(layer, pytmx.TiledObjectGroup):
+            objects = []
+            for obj in layer:
+                props = getattr(obj, "properties", {}) or {}
+                objects.append({
+                    "name": getattr(obj, "name", None),
+                    "type": getattr(obj, "type", None),
+                    "x": obj.x, "y": obj.y,
+                    "width": getattr(obj, "width", 0), "height": getattr(obj, "height", 0),
+                    "gid": raw_gid.get(getattr(obj, "gid", 0) or 0, 0),
+                    "properties": {k: _json_value(v) for k, v in props.items()},
+                })
+            layers.append({"kind": "objects", "name": name, "objects": objects})
+
+    tilesets = [{
+        "firstgid": ts.firstgid,
+        "image": os.path.join(base, ts.source) if ts.source else None,
+        "tilewidth": ts.tilewidth, "tileheight": ts.tileheight,
+        "margin": ts.margin, "spacing": ts.spacing,
+    } for ts in tmx_data.tilesets]
+
+    meta = json.dumps({
+        "width": tmx_data.width, "height": tmx_data.height,
+        "tilewidth": tmx_data.tilewidth, "tileheight": tmx_data.tileheight,
+        "tilesets": tilesets, "layers": layers, "rects": rect_tables,
+    }, ensure_ascii=False).encode("utf-8")
+
+    head = HEADER.pack(MAGIC, FORMAT_VERSION, key, len(meta)) + meta
+    head += b"\0" * (-len(head) % 4)  # массивы начинаются с выровненного адреса
+
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    # свой временный файл у каждого писателя: уровень может компилироваться
+    # одновременно в потоке предзагрузки, в главном потоке и в процессах batch_runner
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(head)
+            for data in sections:
+                f.write(data)
+        os.chmod(tmp_path, 0o644)  # mkstemp создаёт файл с правами 0600
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return out_path
+
+
+# === Загрузка ===
+
+
+
+class CompiledTileLayer:
+    """Тайловый слой артефакта; итерация как у pytmx: (x, y, gid)"""
+    def __init__(self, name, width, height, gids):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.gids = gids  # memoryview uint32 поверх mmap
+
+    def __iter__(self):
+        w = self.width
+        for i, gid in enumerate(self.gids):
+            yield i % w, i // w, gid
+
+
+class CompiledObject:
+    __slots__ = ("name", "type", "x", "y", "width", "height", "gid", "properties")
+
+    def __init__(self, d):
+        for attr in self.__slots__:
+            setattr(self, attr, d.get(attr))
+        self.properties = self.properties or {}
+
+
+class CompiledObjectGroup(list):
+    def __init__(self, name, objects):
+        super().__init__(CompiledObject(o) for o in objects)
+        self.name = name
+
+
+class CompiledMap:
+    """Уровень, прочитанный из артефакта; повторяет нужную игре часть TiledMap"""
+    def __init__(self, filename, mm, meta, data_start):
+        self.filename = filename
+        self._mm = mm
+        self._view = memoryview(mm)
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.tilewidth = meta["tilewidth"]
+        self.tileheight = meta["tileheight"]
+        self.tilesets = meta["tilesets"]
+        self._data_start = data_start
+        self._rects = meta["rects"]
+        self._images = {}
+
+        # файл должен вмещать все массивы: обрезанный артефакт не читаем
+        ends = [layer["gids"] + layer["width"] * layer["height"] * 4
+                for layer in meta["layers"] if layer["kind"] == "tiles"]
+        ends += [offset + count * 16 for tables in self._rects.values() for offset, count in tables]
+        if data_start + max(ends, default=0) > len(mm):
+            raise ValueError("артефакт уровня короче своих массивов")
+
+        self.layers = []
+        for layer in meta["layers"]:
+            if layer["kind"] == "tiles":
+                count = layer["width"] * layer["height"]
+                gids = self._array(layer["gids"], count * 4, "I")
+                self.layers.append(CompiledTileLayer(layer["name"], layer["width"], layer["height"], gids))
+            else:
+                self.layers.append(CompiledObjectGroup(layer["name"], layer["objects"]))
+
+    @property
+    def visible_layers(self):
+        return self.layers
+
+    def _array(self, offset, size, fmt):
+        start = self._data_start + offset
+        return self._view[start:start + size].cast(fmt)
+
+    def rect_table(self, name):
+        """Прямоугольники непустых тайлов слоя коллизий"""
+        rects = []
+        for offset, count in self._rects.get(name, ()):
+            flat = self._array(offset, count * 16, "i")
+            for i in range(0, count * 4, 4):
+                rects.append(pygame.Rect(flat[i], flat[i + 1], flat[i + 2], flat[i + 3]))
+        return rects
+
+    def get_tile_image_by_gid(self, gid):
+        if not gid:
+            return None
+        image = self._images.get(gid)
+        if image is None:
+            image = self._images[gid] = self._load_tile_image(gid)
+        return image
+
+    def _load_tile_image(self, raw):
+        tiled_gid = raw & GID_MASK
+        tileset = None
+        for ts in self.tilesets:
+            if ts["firstgid"] <= tiled_gid:
+                tileset = ts
+        if tileset is None or not tileset["image"]:
+            return None
+
+        sheet = images.load(tileset["image"], "alpha")  # общий для всех уровней
+
+        tw, th = tileset["tilewidth"], tileset["tileheight"]
+        margin, spacing = tileset["margin"], tileset["spacing"]
+        columns = max(1, (sheet.get_width() - 2 * margin + spacing) // (tw + spacing))
+        index = tiled_gid - tileset["firstgid"]
+        x = margin + (index % columns) * (tw + spacing)
+        y = margin + (index // columns) * (th + spacing)
+        # отдельная поверхность, а не subsurface листа: premul_alpha() у subsurface
+        # читает пиксели от начала листа, и в чанки запекались бы чужие тайлы
+        tile = sheet.subsurface((x, y, tw, th)).copy()
+
+        # отражения — так же, как это делает pytmx
+        if raw & FLIP_D:
+            tile = pygame.transform.flip(pygame.transform.rotate(tile, 270), True, False)
+        if raw & (FLIP_H | FLIP_V):
+            tile = pygame.transform.flip(tile, bool(raw & FLIP_H), bool(raw & FLIP_V))
+        return tile
+
+
+def read_compiled(tmx_filename, path=None, key=None):
+    """Открывает артефакт; None, если его нет или он устарел"""
+    path = path or cache_path(tmx_filename)
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if len(mm) < HEADER.size:
+            raise ValueError("нет заголовка")
+        magic, version, stored_key, meta_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("другой формат")
+        if stored_key != (key or source_key(tmx_filename)):
+            raise ValueError("устарел")
+        meta_end = HEADER.size + meta_len
+        if meta_end > len(mm):
+            raise ValueError("метаданные обрезаны")
+        data_start = meta_end + (-meta_end % 4)
+        meta = json.loads(mm[HEADER.size:meta_end].decode("utf-8"))
+        return CompiledMap(tmx_filename, mm, meta, data_start)
+    except (ValueError, KeyError, TypeError):
+        pass
+    # устаревший или повреждённый артефакт — уровень перекомпилируется.
+    # mmap закрываем сразу, а не когда доберётся сборщик мусора; вне except,
+    # чтобы traceback уже не держал срезы memoryview из CompiledMap
+    mm.close()
+    return None
+
+
+_prepared = {}  # путь TMX -> (ключ, CompiledMap) уже открытых уровней
+
+
+def prepare_level(tmx_filename):
+    """Скомпилированный уровень из кэша (при необходимости перекомпилирует).
+
+    Не создаёт поверхностей pygame, поэтому безопасна в фоновом потоке.
+    Возвращает None, если кэш недоступен.
+    """
+    # массивы читаются без перестановки байт только на little-endian
+    if not LEVEL_CACHE_DIR or sys.byteorder != "little":
+        return None
+    key = source_key(tmx_filename)
+    known = _prepared.get(tmx_filename)
+    if known is not None and known[0] == key:
+        return known[1]
+
+    compiled = read_compiled(tmx_filename, key=key)
+    if compiled is None:
+        try:
+            compile_level(tmx_filename)
+        except OSError:
+            pass
+        compiled = read_compiled(tmx_filename, key=key)
+    if compiled is not None:
+        _prepared[tmx_filename] = (key, compiled)
+    return compiled
+
+
+def load_level(tmx_filename):
+    """Скомпилированный уровень, а если кэш недоступен — обычная pytmx-карта"""
+    compiled = prepare_level(tmx_filename)
+    if compiled is not None:
+        return compiled
+    return pytmx.load_pygame(tmx_filename, pixelalpha=True)
+
+
+# типы слоёв для проверок isinstance независимо от источника карты
+TILE_LAYER_TYPES = (pytmx.TiledTileLayer, CompiledTileLayer)
+OBJECT_GROUP_TYPES = (pytmx.TiledObjectGroup, CompiledObjectGroup)
+
+
+def _layer_tiles(tmx_data):
+    # тайлы всех тайловых слоёв как (Surface, x, y), в порядке отрисовки
+    tiles = []
+    for layer in tmx_data.visible_layers:
+        if isinstance(layer, TILE_LAYER_TYPES):
+            for x, y, gid in layer:
+                image = tmx_data.get_tile_image_by_gid(gid) if gid else None
+                if image:
+                    tiles.append((image, x * tmx_data.tilewidth, y * tmx_data.tileheight))
+    return tiles
+
+
+def check_render(tmx_filename):
+    """Чанки тайлов из артефакта против чанков из pytmx: (различных, всего). Нужен display"""
+    from tile_cache import TileLayerCache
+
+    compiled = prepare_level(tmx_filename)
+    if compiled is None:
+        return 0, 0
+    ours = TileLayerCache(_layer_tiles(compiled)).chunks
+    reference = TileLayerCache(_layer_tiles(pytmx.load_pygame(tmx_filename, pixelalpha=True))).chunks
+    differ = set(ours) ^ set(reference)
+    for key in set(ours) & set(reference):
+        if pygame.image.tobytes(ours[key], "RGBA") != pygame.image.tobytes(reference[key], "RGBA"):
+            differ.add(key)
+    return len(differ), len(reference)
+
+
+if __name__ == "__main__":
+    # python level_cache.py [файлы.tmx]          — компиляция всех уровней заранее
+    # python level_cache.py --check [файлы.tmx]  — отрисовка из артефакта совпадает с pytmx
+    args = sys.argv[1:]
+    if "--check" in args:
+        args.remove("--check")
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+        failed = False
+        for tmx_file in args or LEVELS:
+            differ, total = check_render(tmx_file)
+            failed = failed or differ > 0
+            print(f"{tmx_file}: {differ} of {total} chunks differ")
+        sys.exit(1 if failed else 0)
+    for tmx_file in args or LEVELS:
+        print(tmx_file, "->", compile_level(tmx_file))
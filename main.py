@@ -1,725 +1,182 @@
+import time
+_started = time.perf_counter()  # время запуска считается ещё до импорта pygame
 import pygame
 import sys
-import pytmx
-import random
-pygame.init()
-pygame.mixer.init()
+import io
 from constants import *
-from platform import *
-from camera import *
-from player import *
-from map_loader import load_map
-from enemy import Bacteria, Virus, Projectile, Boss
+from startup import StartupTimer, LoadingScreen
+from prefetch import LevelPrefetcher
+from game_session import GameSession, InputState
+from sim_clock import FixedStep
+from sounds import registry as sound_registry, voices
+from image_cache import images
+from resources import get_resources
+from profiler import profiler
 
+startup = StartupTimer(_started)
+startup.stages["import"] = startup.now_ms()
 
 
-def play_level_music(level_index):
+def play_level_music(level_index, level_assets=None):
     pygame.mixer.music.stop()
-    pygame.mixer.music.load(FON_MUSIC[level_index])
+    if level_assets is not None:
+        # музыка уже прочитана в память фоновой предзагрузкой
+        pygame.mixer.music.load(io.BytesIO(level_assets["music"]), level_assets["music_hint"])
+    else:
+        pygame.mixer.music.load(FON_MUSIC[level_index])
     pygame.mixer.music.set_volume(0.3)  # громкость (0.0 – 1.0)
     pygame.mixer.music.play(-1)
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Map from Tiled")
-clock = pygame.time.Clock()
-
-# === Загрузка ассетов ===
-background = pygame.image.load("assets/background-1.png").convert()
-background = pygame.transform.scale(background, (SCREEN_WIDTH, SCREEN_HEIGHT))
-character_sheet1 = pygame.image.load("assets/character/1.png").convert_alpha()
-character_sheet2 = pygame.image.load("assets/character/2.png").convert_alpha()
-character_sheet3 = pygame.image.load("assets/character/3.png").convert_alpha()
-character_sheet4 = pygame.image.load("assets/character/4.png").convert_alpha()
-character_sheet5 = pygame.image.load("assets/character/5.png").convert_alpha()
-
-
-ground = pygame.image.load("assets/ground.png").convert_alpha()
-enemy_sheet = pygame.image.load("assets/enemies.png").convert_alpha()
-
-virus_sheet1 = pygame.image.load("assets/virus/v1.png").convert_alpha()
-virus_sheet2 = pygame.image.load("assets/virus/v2.png").convert_alpha()
-virus_sheet3 = pygame.image.load("assets/virus/v3.png").convert_alpha()
-
-bacteria_sheet1 = pygame.image.load("assets/bacteria/b1.png").convert_alpha()
-bacteria_sheet2 = pygame.image.load("assets/bacteria/b2.png").convert_alpha()
-bacteria_sheet3 = pygame.image.load("assets/bacteria/b3.png").convert_alpha()
-
-shot_sheet = pygame.image.load("assets/fire.png").convert_alpha()
-boss_sheet = pygame.image.load("assets/Boss-1.png").convert_alpha()
-boss_sheet2 = pygame.image.load("assets/Boss-2.png").convert_alpha()
-
-# === Функция для нарезки спрайтов ===
-def get_sprite(sheet, x, y, w, h):
-    sprite = pygame.Surface((w, h), pygame.SRCALPHA)
-    sprite.blit(sheet, (0, 0), (x * w, y * h, w, h))
-    return sprite
-
-# === Спрайты персонажа ===
-player_sprites = {
-    "walk1": get_sprite(character_sheet2, 0, 0, CHAR_SIZE, CHAR_SIZE),
-    "walk2": get_sprite(character_sheet3, 0, 0, CHAR_SIZE, CHAR_SIZE),
-    "jump": get_sprite(character_sheet4, 0, 0, CHAR_SIZE, CHAR_SIZE),
-    "idle": get_sprite(character_sheet1, 0, 0, CHAR_SIZE, CHAR_SIZE),
-    "shift": get_sprite(character_sheet5 , 0, 0, CHAR_SIZE, CHAR_SIZE)
-}
-# === Спрайты босса ===
-boss_sprites = {
-    "idle1": get_sprite(boss_sheet, 0, 0, 256, 256),
-    "idle2": get_sprite(boss_sheet2, 0, 0, 256, 256),
-}
-
-    # Нарезаем спрайты бактерии из enemies.png
-    # Предполагаем: левый верхний (0,0) — idle, снизу (0, CHAR_SIZE) и (CHAR_SIZE, CHAR_SIZE) — walk1, walk2
-tile_heart = get_sprite(ground, 13, 17, TILE_SIZE, TILE_SIZE)
+# окно, часы и предзагрузка создаются в start(): импорт main.py ничего не открывает
+screen = None
+clock = None
+prefetcher = None
+
+
+# === Запуск ===
+def start(first_level=0):
+    """Сначала окно с экраном загрузки, потом ресурсы; False — окно закрыли во время загрузки"""
+    global screen, clock, prefetcher
+    if screen is not None:
+        return True
+    with startup.stage("window"):
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Map from Tiled")
+        clock = pygame.time.Clock()
+        loading = LoadingScreen(screen)
+        loading.draw(0.0)
+    startup.mark("first_frame")
+
+    with startup.stage("audio"):
+        pygame.mixer.init()
+    # в фоне: карта, фон и музыка первого уровня, звуковые эффекты
+    prefetcher = LevelPrefetcher()
+    prefetcher.request(first_level)
+    sound_registry.preload_async()
+    # в главном потоке (нужен display) — по одному шагу на кадр экрана загрузки
+    steps = [("спрайты", "sprites", get_resources)]
+    waits = [("уровень", lambda: prefetcher.ready(first_level)), ("звуки", sound_registry.ready)]
+    total = len(steps) + len(waits)
+    with startup.stage("loading"):
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return False
+            if steps:
+                label, name, load = steps.pop(0)
+                with startup.stage(name):
+                    load()
+            waiting = [label for label, ready in waits if not ready()]
+            if not steps and not waiting:
+                break
+            loading.draw((total - len(steps) - len(waiting)) / total, (steps[0][0] if steps else waiting[0]) + "...")
+            clock.tick(FPS)
+    startup.stages["sounds_bg"] = sound_registry.total_ms()  # декодирование в фоновом потоке
+    return True
 
 
 # === Перезапуск ===
 def restart_game(saved_coins=0, saved_diamonds=0):
     main(0, saved_coins, saved_diamonds)
 
-# === Основная функция ===
-def main(current_level=0, saved_coins=0, saved_diamonds=0):
+# === Один уровень ===
+def play_level(current_level, saved_coins, saved_diamonds):
+    """Уровень от загрузки до конца: следующий (уровень, монеты, алмазы) или None при выходе"""
     # Загружаем текущий уровень
     if current_level >= len(LEVELS):
         current_level = 0  # Циклим на первый уровень (или финальный экран)
     
-    play_level_music(current_level)
-    level_file = LEVELS[current_level]
-    bg_path = BACKGROUNDS[current_level % len(BACKGROUNDS)]
-    background = pygame.image.load(bg_path).convert()
-    background = pygame.transform.scale(background, (SCREEN_WIDTH, SCREEN_HEIGHT))
-    
-    tmx_data, tiles, traps, platforms, enemy_objs, exit_rect = load_map(level_file)
-
-    # === Переменные для квиза ===
-    quiz_active = False
-    quiz_question = None
-    quiz_buttons = []  # кнопки для выбора ответа
-    quiz_correct_idx = -1
+    # карта, фон и музыка — из фоновой предзагрузки (или синхронно, если не готовы)
+    level_assets = prefetcher.take(current_level)
+    play_level_music(current_level, level_assets)
+    # уже декодированный и масштабированный фон; при повторе уровня — готовый из кеша
+    background = images.load(level_assets["background"], "convert", (SCREEN_WIDTH, SCREEN_HEIGHT))
 
-    # === Info (таблички) ===
-    info_objects = []  # список: {"rect": Rect, "text": str}
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledObjectGroup) and (getattr(layer, "name", "") or "").lower() == "info":
-            for obj in layer:
-                text = ""
-                props = getattr(obj, "properties", {}) or {}
-                # в Tiled вы добавили property "text"
-                text = props.get("text", "") or props.get("Text", "") or ""
-                obj_w = int(getattr(obj, "width", TILE_SIZE))
-                obj_h = int(getattr(obj, "height", TILE_SIZE))
-                rect_x = int(obj.x)
-                rect_y = int(obj.y) - obj_h  # корректировка для tile-object
-                r = pygame.Rect(rect_x, rect_y, obj_w, obj_h)
-                info_objects.append({"rect": r, "text": text})
+    # состояние уровня и вся симуляция — в GameSession; здесь только окно, события и время
+    session = GameSession(current_level, saved_coins, saved_diamonds, background)
+    profiler.info["colliders"] = session.level.merge_summary  # склейка тайлов уровня (F3)
+    profiler.info["voices"] = voices.summary
+    profiler.info["images"] = images.summary
 
-    # Info window state
-    info_active = False
-    info_text = ""
-    
-
-    collectibles = []  # элементы: {"type":"coin"/"diamond"/"medkit","rect":Rect,"gid":gid,"value":int,"draw":(x,y)}
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledObjectGroup):
-            lname = (getattr(layer, "name", "") or "").lower()
-            if lname in ("collectibles", "pickups"):
-                for obj in layer:
-                    oname = (getattr(obj, "name", "") or "").lower()
-                    if oname in ("coin", "diamond", "medkit", "ammo"):
-                        obj_w = int(obj.width) if getattr(obj, "width", None) else TILE_SIZE
-                        obj_h = int(obj.height) if getattr(obj, "height", None) else TILE_SIZE
-                        rect_x = int(obj.x)
-                        rect_y = int(obj.y) - obj_h  # корректировка для tile-объекта
-                        rect = pygame.Rect(rect_x, rect_y, obj_w, obj_h)
-                        props = getattr(obj, "properties", {}) or {}
-                        value = int(props.get("value", 1)) if oname != "medkit" else 1
-                        gid = getattr(obj, "gid", None)
-
-                        draw_x = rect_x
-                        draw_y = rect_y
-                        if gid:
-                            img = tmx_data.get_tile_image_by_gid(gid)
-                            if img:
-                                tile_x = int(obj.x) // TILE_SIZE
-                                tile_y = int(obj.y) // TILE_SIZE
-                                draw_x = tile_x * TILE_SIZE
-                                draw_y = tile_y * TILE_SIZE + TILE_SIZE - img.get_height()
-
-                        collectibles.append({
-                            "type": oname,
-                            "rect": rect,
-                            "gid": gid,
-                            "value": value,
-                            "draw": (draw_x, draw_y)
-                        })
-
-
-    # --- Сбор портала выхода ---
-    exit_portal = None
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledObjectGroup):
-            if layer.name.lower() == "exit":  # Ищем слой с именем "Exit"
-                for obj in layer:
-                    # Объект может быть с gid (спрайт) или без, берём его координаты
-                    exit_portal = pygame.Rect(
-                        int(obj.x), 
-                        int(obj.y), 
-                        int(obj.width) if obj.width else TILE_SIZE, 
-                        int(obj.height) if obj.height else TILE_SIZE
-                    )
-                    #print(f"Портал найден на уровне {current_level + 1}: {exit_portal}")
-                    break
-            if exit_portal:
-                break
-
-    # --- Сбор прямоугольников воды и зыбучих песков (одним проходом) ---
-    water_layer = None
-    water_rects = []
-    quicksand_layer = None
-    quicksand_rects = []
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledTileLayer):
-            name = getattr(layer, "name", "")
-            if name == "Water":
-                water_layer = layer
-                for x, y, gid in layer:
-                    if gid != 0:
-                        water_rects.append(pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
-            elif name in ("Quicksand", "Sand"):
-                quicksand_layer = layer
-                for x, y, gid in layer:
-                    if gid != 0:
-                        quicksand_rects.append(pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
-
-    map_pixel_height = tmx_data.height * tmx_data.tileheight
-    player = Player(100, 300, map_pixel_height, player_sprites)
-    player.coins = int(saved_coins)
-    player.diamonds = int(saved_diamonds)
-    camera = Camera()
-
-    
-    bacteria_sprites = {
-    "idle": get_sprite(bacteria_sheet1, 0, 0, TILE_SIZE, TILE_SIZE),      # (0, 0)
-    "walk1": get_sprite(bacteria_sheet2, 0, 0, TILE_SIZE, TILE_SIZE),      # (0, 128) в пикселях
-    "walk2": get_sprite(bacteria_sheet3, 0, 0, TILE_SIZE, TILE_SIZE),
-    }
-
-    virus_sprites = {
-    "idle": get_sprite(virus_sheet3, 0, 0, TILE_SIZE, TILE_SIZE),      # (0, 0)
-    "walk1": get_sprite(virus_sheet2, 0, 0, TILE_SIZE, TILE_SIZE),      # (0, 128) в пикселях
-    "walk2": get_sprite(virus_sheet1, 0, 0, TILE_SIZE, TILE_SIZE),
-    }
-    proj_img1 = get_sprite(shot_sheet, 0, 0, TILE_SIZE, TILE_SIZE)
-    proj_img2 = get_sprite(shot_sheet, 0, 1, TILE_SIZE, TILE_SIZE)
-        
-    enemies = []
-    boss = None
-    for eo in enemy_objs:
-        name = eo.get("name","").lower()
-        hp_val = eo.get("hp", None)
-        if name == "bacteria":
-            ex = eo["x"]
-            ey = eo["y"] - TILE_SIZE
-            enemies.append(Bacteria(ex, ey, bacteria_sprites, hp=hp_val))
-        elif name == "virus":
-            ex = eo["x"]
-            ey = eo["y"] - TILE_SIZE
-            enemies.append(Virus(ex, ey, virus_sprites, hp=hp_val))
-        elif name == "boss":
-            #print("Босс создан!")
-            ex = eo["x"]
-            ey = eo["y"] - 256
-            boss = Boss(ex, ey, boss_sprites, hp=hp_val)
-#
-    #print(f"Создано врагов: {len(enemies)} (бактерий: {sum(1 for e in enemies if isinstance(e, Bacteria))}, вирусов: {sum(1 for e in enemies if isinstance(e, Virus))}), боссов: {1 if boss else 0})")
-    #print(f"Объекты врагов из карты: {enemy_objs}")
-
-    # список снарядов (врагов)
-    enemy_projectiles = []
-    player_projectiles = []
-
-    #print(f"Уровень {current_level + 1}/{len(LEVELS)}")
+    # пока играется этот уровень, в фоне готовим следующий
+    prefetcher.request((current_level + 1) % len(LEVELS))
 
     running = True
-    level_complete = False
-    
-    while running and not level_complete:
-        
-        dt = 1
-
-        if quiz_active:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    mx, my = event.pos
-                    for btn in quiz_buttons:
-                        if btn["rect"].collidepoint(mx, my):
-                            # проверяем ответ
-                            if btn["index"] == quiz_correct_idx:
-                                # верный ответ — переходим на следующий уровень
-                                LEVEL_COMPLETE_SOUND.play()
-                                main(current_level + 1, player.coins, player.diamonds)
-                                return
-                            else:
-                                # неверный ответ — отнимаем 1 hp
-                                player.hp -= 1
-                                quiz_active = False
-                                quiz_question = None
-                            break
-        
-
-
-        else:
-            # --- ОБЫЧНАЯ ОБРАБОТКА СОБЫТИЙ (когда квиза нет) ---
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and player.coins > 0:
-                    # мировые координаты мыши
-                    player.coins -= 1  # стрельба стоит 1 монету
-                    mx, my = event.pos
-                    world_x = mx - camera.offset_x
-                    world_y = my - camera.offset_y
-                    px = player.hitbox.centerx
-                    py = player.hitbox.centery
-                    vec = pygame.Vector2(world_x - px, world_y - py)
-                    if vec.length() == 0:
-                        vec = pygame.Vector2(1, 0)
-                    vec = vec.normalize()
-                    speed = 8.0
-                    vx = vec.x * speed
-                    vy = vec.y * speed
-                    p = Projectile(px, py, vx, vy, color=(255,220,80), life=3000, image=proj_img1)
-                    player_projectiles.append(p)
-                
-                elif event.type == pygame.KEYDOWN and event.key == pygame.K_i:
-                    # переключение окна информации, если рядом с любой табличкой
-                    print(22)
-                    toggled = False
-                    for info in info_objects:
-                        # расширяем область для удобства взаимодействия
-                        if player.hitbox.colliderect(info["rect"].inflate(24, 24)):
-                            # если уже открыто — закрыть; иначе открыть с текстом из объекта
-                            if info_active and info_text == info["text"]:
-                                info_active = False
-                                info_text = ""
-                            else:
-                                info_active = True
-                                info_text = info["text"] or ""
-                            toggled = True
-                            break
-                    # если не рядом с табличкой и окно открыто — закрыть
-                    if not toggled and info_active:
-                        info_active = False
-                        info_text = ""
-
-            
+    controls = InputState()
 
+    # симуляция идёт фиксированными шагами, отрисовка — с какой частотой получится
+    stepper = FixedStep()
+    clock.tick()  # загрузка уровня не должна превращаться в шаги догоняния
+    frame_ms = stepper.step_ms
+    
+    while running:
+        t = profiler.now()
+        controls.read_keys(pygame.key.get_pressed())
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and player.coins > 0:
-                # мировые координаты мыши
-                player.coins -= 1  # стрельба стоит 1 монету
-                mx, my = event.pos
-                world_x = mx - camera.offset_x
-                world_y = my - camera.offset_y
-                px = player.hitbox.centerx
-                py = player.hitbox.centery
-                vec = pygame.Vector2(world_x - px, world_y - py)
-                if vec.length() == 0:
-                    vec = pygame.Vector2(1, 0)
-                vec = vec.normalize()
-                speed = 8.0
-                vx = vec.x * speed
-                vy = vec.y * speed
-                p = Projectile(px, py, vx, vy, color=(255,220,80), life=3000, image=proj_img1)
-                player_projectiles.append(p)
-        
-# Обновляем снаряды игрока
-        for proj in player_projectiles[:]:
-            dead = proj.update(dt)
-            hit_any = False
-            for e in enemies[:]:
-                if proj.rect.colliderect(e.hitbox):
-                    dmg = getattr(player, "projectile_damage", 1)
-                    try:
-                        died = e.damage(dmg)
-                    except Exception:
-                        e.hp -= dmg
-                        died = e.hp <= 0
-                    if died:
-                        try:
-                            ENEMY_DEATH_SOUND.play()
-                            enemies.remove(e)
-                        except ValueError:
-                            pass
-                    hit_any = True
-                    break
-            
-            # Проверяем попадание в босса
-            if not hit_any and boss and proj.rect.colliderect(boss.hitbox):
-                try:
-                    died = boss.damage(getattr(player, "projectile_damage", 1))
-                    if died:
-                        boss = None
-                        LEVEL_COMPLETE_SOUND.play()
-                        main(current_level + 1, player.coins, player.diamonds)
-                        return
-                except Exception:
-                    pass
-                hit_any = True
-            
-            if hit_any or dead:
-                try:
-                    player_projectiles.remove(proj)
-                except ValueError:
-                    pass
-
-        # 1. Обновляем платформы
-        for platform in platforms:
-            platform.update()
-
-        # 2. Формируем поверхность для коллизий
-        all_tiles = tiles.copy()
-        for platform in platforms:
-            top_surface = pygame.Rect(platform.rect.x, platform.rect.y - 1, platform.rect.width, 2)
-            all_tiles.append(top_surface)
-
-        if quicksand_rects:
-            all_tiles.extend(quicksand_rects)
-
-        # 3. Вычисляем состояние (вода/пески)
-        feet = pygame.Rect(player.hitbox.x, player.hitbox.bottom, player.hitbox.width, 2)
-        in_water = any(w.colliderect(feet) for w in water_rects) if water_rects else False
-        in_quicksand = any(q.colliderect(feet) for q in quicksand_rects) if quicksand_rects else False
-        
-        player.update(all_tiles, traps, in_water, in_quicksand)
-
-        # Обновляем врагов
-        for e in enemies:
-            e.update(player, all_tiles, enemy_projectiles)
-            # контакт враг - игрок (но НЕ если активна защита)
-            if e.hitbox.colliderect(player.hitbox) and not player.shield_active:
-                now = pygame.time.get_ticks()
-                if now - player.last_hit_time > player.invincible_delay:
-                    player.hp -= 1
-                    player.last_hit_time = now
-                    player.vel_y = -8  # отскок вверх
-
-        if boss:
-            boss.update(player, all_tiles, enemy_projectiles)
-            # контакт босс - игрок
-            if boss.hitbox.colliderect(player.hitbox) and not player.shield_active:
-                now = pygame.time.get_ticks()
-                if now - player.last_hit_time > player.invincible_delay:
-                    player.hp -= 2  # босс наносит больше урона
-                    player.last_hit_time = now
-                    player.vel_y = -10
-
-        # Обновляем снаряды врагов
-        dt = 1
-        for proj in enemy_projectiles[:]:
-            dead = proj.update(dt)
-            if proj.rect.colliderect(player.hitbox) and player.shield_active:
-                # Если щит активен — игнорируем урон, но удаляем снаряд
-                try:
-                    enemy_projectiles.remove(proj)
-                except ValueError:
-                    pass
-            elif proj.rect.colliderect(player.hitbox) and not player.shield_active:
-                now = pygame.time.get_ticks()
-                if now - player.last_hit_time > player.invincible_delay:
-                    player.hp -= 1
-                    player.last_hit_time = now
-                try:
-                    enemy_projectiles.remove(proj)
-                except ValueError:
-                    pass
-            elif dead:
-                try:
-                    enemy_projectiles.remove(proj)
-                except ValueError:
-                    pass
-        # --- Подбор коллектиблов ---
-        for c in collectibles[:]:
-            if c["rect"].colliderect(player.hitbox):
-                if c["type"] == "coin":
-                    player.coins += c["value"] *10
-                    PICKUP_SOUND.play()
-                elif c["type"] == "diamond":
-                    player.diamonds += c["value"]
-                    PICKUP_SOUND.play()
-                elif c["type"] == "medkit":
-                    HEAL_SOUND.play()
-                    # восстановление 1 HP (с учётом max_hp, если есть)
-                    max_hp = getattr(player, "max_hp", None)
-                    if max_hp is None:
-                        # если нет max_hp, ограничим максимум любым числом (например 10)
-                        max_hp = 10
-                    player.hp = min(player.hp + 1, max_hp)
-                elif c["type"] == "ammo":
-                    # при подборе — меняем спрайт снаряда игрока и увеличиваем урон в 2 раза
-                    PICKUP_SOUND.play()
-                    proj_img1 = proj_img2
-                    player.projectile_damage = int(getattr(player, "projectile_damage", 1) * 2)
-                    # если есть gid — используем изображение тайла для снаряда
-                    gid = c.get("gid")
-                    if gid is not None:
-                        img = tmx_data.get_tile_image_by_gid(gid)
-                        if img:
-                            # уменьшить до размера пули
-                            player.proj_img1 = pygame.transform.scale(img, (12, 12))
-                    else:
-                        # fallback: используем дефолт proj_img
-                        player.proj_img1 = proj_img1
-                try:
-                    collectibles.remove(c)
-                except ValueError:
-                    pass
-
-        # 4. Применяем движение платформ
-        for platform in platforms:
-            on_platform = (
-                player.hitbox.bottom >= platform.rect.top - 5 and
-                player.hitbox.bottom <= platform.rect.top + 15 and
-                player.hitbox.left < platform.rect.right and
-                player.hitbox.right > platform.rect.left and
-                player.vel_y >= 0
-            )
-            if on_platform:
-                player.hitbox.x += int(platform.last_move.x)
-                player.hitbox.y += int(platform.last_move.y)
-                player.rect = player.image.get_rect(midbottom=player.hitbox.midbottom)
-
-        # 5. Проверяем выход из уровня
-        # Проверка столкновения с Exit (если не в квизе)
-        if exit_portal and not quiz_active:
-            if player.hitbox.colliderect(exit_portal):
-                # активируем квиз
-                quiz_active = True
-                # берём вопрос уровня
-                if current_level < len(LEVEL_QUIZ):
-                    quiz_question = LEVEL_QUIZ[current_level]
-                    quiz_correct_idx = quiz_question.get("correct", -1)
-                    # создаём кнопки для ответов
-                    quiz_buttons = []
-                    btn_width = 300
-                    btn_height = 60
-                    btn_x = SCREEN_WIDTH // 2 - btn_width // 2
-                    for i, answer in enumerate(quiz_question.get("answers", [])):
-                        btn_y = 350 + i * 80
-                        quiz_buttons.append({
-                            "rect": pygame.Rect(btn_x, btn_y, btn_width, btn_height),
-                            "text": answer,
-                            "index": i
-                        })
-        # 6. Проверяем смерть
-        if player.hp <= 0:
-            #print("Игрок погиб! Перезагрузка уровня 1...")
-            main(current_level, player.coins, player.diamonds)
-            return
-
-        camera.update(player)
-
-        # === ОТРИСОВКА ===
-        screen.blit(background, (0, 0))
-
-        for layer in tmx_data.visible_layers:
-            if isinstance(layer, pytmx.TiledTileLayer):
-                for x, y, gid in layer:
-                    tile = tmx_data.get_tile_image_by_gid(gid)
-                    if tile:
-                        screen.blit(tile, (x * TILE_SIZE + camera.offset_x, y * TILE_SIZE + camera.offset_y))
-
-        for platform in platforms:
-            platform.draw(screen, (camera.offset_x, camera.offset_y))
-
-
-
-        screen.blit(player.image, (player.rect.x + camera.offset_x, player.rect.y + camera.offset_y))
-        for e in enemies:
-            e.draw(screen, (camera.offset_x, camera.offset_y))
-        if boss:
-            boss.draw(screen, (camera.offset_x, camera.offset_y))
-
-
-        # Рисуем снаряды врагов
-        for proj in enemy_projectiles:
-            proj.draw(screen, (camera.offset_x, camera.offset_y))
-
-        for proj in player_projectiles:
-            proj.draw(screen, (camera.offset_x, camera.offset_y))
-
-
-
-        for layer in tmx_data.visible_layers:
-            if isinstance(layer, pytmx.TiledObjectGroup):
-                for obj in layer:
-                    gid = getattr(obj, "gid", None)
-                    if gid:
-                        # Пропускаем отрисовку tile-объектов платформ
-                        layer_name = (getattr(layer, "name", "") or "").lower()
-                        obj_name = (getattr(obj, "name", "") or "").lower()
-                        if layer_name in ("movingplatform", "movingplatforms", "platforms") or obj_name == "movingplatform":
-                            continue
-
-                        # Пропускаем tile-объекты с именем "exit" (портал рисуется отдельно через зелёный контур)
-                        if obj_name == "exit":
-                            continue
-
-                        # Пропускаем отрисовку коллектиблов — будем рисовать их через список collectibles
-                        if layer_name == "collectibles" and obj_name in ("coin", "diamond", "medkit", "ammo"):
-                            continue
-
-                        img = tmx_data.get_tile_image_by_gid(gid)
-                        if img:
-                            # выравниваем позицию по сетке тайлов
-                            tile_x = int(obj.x) // TILE_SIZE
-                            tile_y = int(obj.y) // TILE_SIZE
-                            draw_x = tile_x * TILE_SIZE + camera.offset_x
-                            draw_y = tile_y * TILE_SIZE + camera.offset_y + TILE_SIZE - img.get_height()
-                            screen.blit(img, (draw_x, draw_y))
-
-        # Рисуем текущие (не собранные) коллектиблы
-        for c in collectibles:
-            gid = c.get("gid")
-            if gid is not None:
-                img = tmx_data.get_tile_image_by_gid(gid)
-                if img:
-                    draw_x, draw_y = c.get("draw", (c["rect"].x, c["rect"].y))
-                    screen.blit(img, (draw_x + camera.offset_x, draw_y + camera.offset_y))
-            else:
-                # если без gid, рисуем простым прямоугольником (на случай)
-                screen.fill((255, 215, 0), (c["rect"].x + camera.offset_x, c["rect"].y + camera.offset_y, c["rect"].width, c["rect"].height))
-
-        # Слой воды (рисовать поверх игрока)
-        if water_layer is not None:
-            for x, y, gid in water_layer:
-                tile = tmx_data.get_tile_image_by_gid(gid)
-                if tile:
-                    screen.blit(tile, (x * TILE_SIZE + camera.offset_x, y * TILE_SIZE + camera.offset_y))
-
-        # Слой песков (если хотите видеть их поверх/под игроком)
-        if quicksand_layer is not None:
-            for x, y, gid in quicksand_layer:
-                tile = tmx_data.get_tile_image_by_gid(gid)
-                if tile:
-                    screen.blit(tile, (x * TILE_SIZE + camera.offset_x, y * TILE_SIZE + camera.offset_y))
-
-        # HUD
-
-        # Полоска маны (щита)
-        mana_bar_x = 10
-        mana_bar_y = 140
-        mana_bar_width = 200
-        mana_bar_height = 18
-        # фон
-        pygame.draw.rect(screen, (40, 40, 40), (mana_bar_x, mana_bar_y, mana_bar_width, mana_bar_height))
-        # заполнение
-        mana_filled = int(mana_bar_width * max(0.0, min(1.0, player.mana)))
-        pygame.draw.rect(screen, (80, 170, 255), (mana_bar_x, mana_bar_y, mana_filled, mana_bar_height))
-        # рамка
-        pygame.draw.rect(screen, (200, 200, 200), (mana_bar_x, mana_bar_y, mana_bar_width, mana_bar_height), 2)
-        # подпись
-        font_small = pygame.font.Font(None, 24)
-        status = "Shield: ON" if player.shield_active else "Shield: OFF"
-        mana_text = font_small.render(f"{status}  ({player.diamonds} diamonds)", True, (180, 220, 255))
-        screen.blit(mana_text, (mana_bar_x, mana_bar_y - 22))
-
-
-        for i in range(player.hp):
-            screen.blit(tile_heart, (10 + i * 40, 10))
-
-         # Счётчики коллектиблов
-        font = pygame.font.Font(None, 36)
-        coin_text = font.render(f"Антитела: {player.coins}", True, (255, 215, 0))
-        diamond_text = font.render(f"Имунитет: {player.diamonds}", True, (0, 200, 255))
-        screen.blit(coin_text, (10, 60))
-        screen.blit(diamond_text, (10, 100))
-        
-        # Номер уровня
-        font = pygame.font.Font(None, 36)
-        level_text = font.render(f"Уровень {current_level + 1}/{len(LEVELS)}", True, (255, 255, 255))
-        screen.blit(level_text, (SCREEN_WIDTH - 300, 10))
-
-        # === ОТРИСОВКА КВИЗА ===
-        if quiz_active and quiz_question:
-            # полупрозрачная подложка
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(200)
-            overlay.fill((0, 0, 0))
-            screen.blit(overlay, (0, 0))
-            
-            # заголовок
-            font_title = pygame.font.Font(None, 48)
-            title = font_title.render(f"Уровень: {quiz_question.get('level', 'Unknown')}", True, (255, 255, 0))
-            screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 50))
-            
-            # вопрос
-            font_q = pygame.font.Font(None, 36)
-            question_lines = []
-            q_text = quiz_question.get("question", "")
-            for line in q_text.split("\n"):
-                question_lines.append(font_q.render(line, True, (255, 255, 255)))
-            
-            q_y = 150
-            for line in question_lines:
-                screen.blit(line, (SCREEN_WIDTH // 2 - line.get_width() // 2, q_y))
-                q_y += 40
-            
-            # кнопки ответов
-            font_btn = pygame.font.Font(None, 28)
-            for btn in quiz_buttons:
-                color = (0, 200, 0) if btn["rect"].collidepoint(pygame.mouse.get_pos()) else (100, 100, 200)
-                pygame.draw.rect(screen, color, btn["rect"])
-                pygame.draw.rect(screen, (255, 255, 255), btn["rect"], 3)
-                
-                btn_text = font_btn.render(btn["text"], True, (255, 255, 255))
-                screen.blit(btn_text, (btn["rect"].centerx - btn_text.get_width() // 2,  btn["rect"].centery - btn_text.get_height() // 2))
-
-
-        if info_active and info_text:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(200)
-            overlay.fill((0, 0, 0))
-            screen.blit(overlay, (0, 0))
-            # рамка
-            box_w = SCREEN_WIDTH - 240
-            box_h = SCREEN_HEIGHT - 240
-            box_x = 120
-            box_y = 120
-            pygame.draw.rect(screen, (18, 18, 28), (box_x, box_y, box_w, box_h))
-            pygame.draw.rect(screen, (190, 190, 230), (box_x, box_y, box_w, box_h), 3)
-            # текст с простым переносом
-            font = pygame.font.Font(None, 36)
-            words = info_text.split(" ")
-            line = ""
-            y = box_y + 20
-            max_w = box_w - 40
-            for w in words:
-                test = (line + " " + w).strip()
-                surf = font.render(test, True, (230, 230, 230))
-                if surf.get_width() > max_w and line != "":
-                    screen.blit(font.render(line, True, (230, 230, 230)), (box_x + 20, y))
-                    y += 34
-                    line = w
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                if session.quiz_active:
+                    # выбор ответа в квизе
+                    answer = session.quiz_button_at(event.pos)
+                    if answer is not None:
+                        controls.answer = answer
                 else:
-                    line = test
-            if line:
-                screen.blit(font.render(line, True, (230, 230, 230)), (box_x + 20, y))
-            hint = pygame.font.Font(None, 20).render("Нажмите I чтобы закрыть", True, (180, 180, 180))
-            screen.blit(hint, (box_x + box_w - hint.get_width() - 12, box_y + box_h - 28))
-
+                    # выстрел: мировые координаты мыши
+                    mx, my = event.pos
+                    controls.shots.append((mx - session.camera.offset_x, my - session.camera.offset_y))
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_i and not session.quiz_active:
+                controls.interact = True
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                # замеры фаз кадра и график времени кадров
+                profiler.toggle()
+                t = profiler.now()
+        t = profiler.lap("events", t)
+
+        # === СИМУЛЯЦИЯ: фиксированные шаги, сколько положено по реальному времени ===
+        for _ in stepper.steps(frame_ms):
+            session.step(controls)
+            controls.clear_actions()
+            if session.outcome is not None:
+                break
+        if session.outcome == "dead":
+            # быстрое возрождение: уровень восстанавливается из начального снимка в памяти
+            session.respawn()
+        elif session.outcome is not None:
+            break
 
+        # === ОТРИСОВКА ===
+        session.draw(screen, stepper.alpha)
+        t = profiler.now()
+        profiler.draw(screen)
+        t = profiler.lap("overlay", t)
         pygame.display.flip()
-        clock.tick(FPS)
+        t = profiler.lap("flip", t)
+        if not startup.done:
+            startup.mark("first_game_frame")
+            startup.finish(STARTUP_LOG)
+        t = profiler.now()
+        frame_ms = clock.tick(FPS)
+        profiler.lap("idle", t)  # ожидание до следующего кадра при FPS
+        profiler.end_frame()
+
+    if session.outcome == "complete":
+        # Переход на следующий уровень
+        return current_level + 1, session.player.coins, session.player.diamonds
+    return None
 
-    # Переход на следующий уровень
-    if level_complete:      
-        main(current_level + 1, player.coins, player.diamonds)
+# === Основная функция ===
+def main(current_level=0, saved_coins=0, saved_diamonds=0):
+    # Уровни сменяют друг друга в одном цикле, без рекурсии: состояние
+    # пройденного уровня (GameSession) освобождается целиком, а спрайты,
+    # шрифты и звуки общие и загружаются один раз
+    if not start(current_level):
+        return
+    state = (current_level, saved_coins, saved_diamonds)
+    while state is not None:
+        state = play_level(*state)
 
 if __name__ == "__main__":
     main(0, 0, 0)  # Начинаем с уровня 0 (level-1.tmx)
-
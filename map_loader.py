@@ -1,31 +1,144 @@
 import pygame
-import pytmx
 from platform import MovingPlatform 
-from constants import TILE_SIZE
+from constants import TILE_SIZE, MERGE_COLLIDERS
+from collision_grid import CollisionGrid
+from level_cache import load_level, CompiledMap, TILE_LAYER_TYPES, OBJECT_GROUP_TYPES
+
+# слои тайлов, дающие коллизии; ловушки собираются отдельно
+SOLID_LAYERS = ("ground", "sand", "quicksand")
+COLLECTIBLE_NAMES = ("coin", "diamond", "medkit", "ammo")
+PLATFORM_LAYERS = ("movingplatform", "movingplatforms", "platforms")
+
+
+class LevelData:
+    """Всё, что игровому циклу нужно знать об уровне — уже без объектов pytmx"""
+    def __init__(self, filename):
+        self.filename = filename
+        self.width = 0  # в тайлах
+        self.height = 0
+        self.pixel_height = 0
+
+        self.colliders = None      # CollisionGrid: земля, песок, зыбучие пески
+        self.hazards = None        # CollisionGrid: ловушки
+        self.solid_cells = None    # bool-массив ячеек с твёрдыми тайлами (для снарядов)
+        self.merge_stats = {}      # слой -> (тайлов, коллайдеров после склейки)
+        self.water_rects = []      # жидкие зоны
+        self.quicksand_rects = []
+
+        self.platforms = []        # MovingPlatform
+        self.enemies = []          # {"name", "x", "y", "hp"}
+        self.collectibles = []     # {"type", "rect", "gid", "image", "value", "draw"}
+        self.signs = []            # {"rect", "text"}
+        self.exit_rect = None      # объект с именем "exit"
+        self.exit_portal = None    # первый объект слоя "Exit"
+
+        # отрисовка: тайлы слоёв как (Surface, x, y) в мировых координатах
+        self.tile_layers = []      # [(имя слоя, [тайлы])]
+        self.water_tiles = []      # слой Water (рисуется поверх игрока)
+        self.quicksand_tiles = []  # слой Quicksand/Sand (рисуется поверх игрока)
+        self.decorations = []      # статические tile-объекты: [(Surface, (x, y))]
+
+    def merge_summary(self):
+        """Склейка коллайдеров по слоям для оверлея F3: «слой тайлов->коллайдеров»"""
+        return "  ".join(f"{name} {tiles}->{rects}" for name, (tiles, rects) in self.merge_stats.items())
 
-def load_map(filename):
-    tmx_data = pytmx.load_pygame(filename, pixelalpha=True)
-    tiles = []
-    traps = []
-    platforms = []
-    enemies = []  # список объектов врагов (словарь с полями name,x,y)
 
-    exit_rect = None
+def merge_tile_rects(rects, vertical=True):
+    """Склеивает тайловые прямоугольники в минимум крупных.
+
+    Сначала соседние тайлы строки собираются в горизонтальные отрезки,
+    затем (если vertical) отрезки с одинаковыми границами в соседних
+    строках — в блоки. Результат отсортирован сверху вниз, слева направо,
+    как исходные тайлы.
+    """
+    rows = {}
+    for r in rects:
+        rows.setdefault(r.y // TILE_SIZE, set()).add(r.x // TILE_SIZE)
+
+    merged = []
+    open_blocks = {}  # (x0, x1) -> [x0, y0, x1, y1] — блок, растущий вниз
+    for y in sorted(rows):
+        xs = sorted(rows[y])
+        runs = []
+        start = prev = xs[0]
+        for x in xs[1:]:
+            if x != prev + 1:
+                runs.append((start, prev))
+                start = x
+            prev = x
+        runs.append((start, prev))
+
+        next_blocks = {}
+        for run in runs:
+            block = open_blocks.pop(run, None) if vertical else None
+            if block is not None and block[3] == y - 1:
+                block[3] = y
+            else:
+                if block is not None:
+                    merged.append(block)  # между строками был разрыв
+                block = [run[0], y, run[1], y]
+            next_blocks[run] = block
+        merged.extend(open_blocks.values())  # блоки, не продолжившиеся в этой строке
+        open_blocks = next_blocks
+    merged.extend(open_blocks.values())
+
+    merged.sort(key=lambda b: (b[1], b[0]))
+    return [pygame.Rect(x0 * TILE_SIZE, y0 * TILE_SIZE,
+                        (x1 - x0 + 1) * TILE_SIZE, (y1 - y0 + 1) * TILE_SIZE)
+            for x0, y0, x1, y1 in merged]
+
+
+def load_map(filename, merge=MERGE_COLLIDERS):
+    """Читает уровень за один проход по слоям и возвращает LevelData"""
+    # скомпилированный артефакт (без разбора XML) или pytmx, если кэш недоступен
+    tmx_data = load_level(filename)
+    compiled = isinstance(tmx_data, CompiledMap)
+    level = LevelData(filename)
+    level.width = tmx_data.width
+    level.height = tmx_data.height
+    level.pixel_height = tmx_data.height * tmx_data.tileheight
+
+    layer_rects = {}  # имя слоя коллизий -> тайловые прямоугольники
+    if compiled:
+        for name in SOLID_LAYERS + ("traps",):
+            rects = tmx_data.rect_table(name)
+            if rects:
+                layer_rects[name] = rects
+
     for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledTileLayer):
+        layer_name = getattr(layer, "name", "") or ""
+        lname = layer_name.lower()
+
+        if isinstance(layer, TILE_LAYER_TYPES):
+            layer_tiles = []
+            rects = []
             for x, y, gid in layer:
-                if gid != 0:
-                    name = getattr(layer, "name", "").lower()
-                    # считаем Ground и Sand как коллизии
-                    if name in ("ground", "sand"):
-                        tiles.append(pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
-                    elif name == "traps":
-                        traps.append(pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
-        elif isinstance(layer, pytmx.TiledObjectGroup):
+                if gid == 0:
+                    continue
+                rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                rects.append(rect)
+                image = tmx_data.get_tile_image_by_gid(gid)
+                if image:
+                    layer_tiles.append((image, rect.x, rect.y))
+            level.tile_layers.append((layer_name, layer_tiles))
+
+            # считаем Ground и Sand (и зыбучие пески) как коллизии, Traps — отдельный набор
+            if lname in SOLID_LAYERS + ("traps",) and rects and not compiled:
+                layer_rects.setdefault(lname, []).extend(rects)
+            # вода и зыбучие пески замедляют игрока
+            if layer_name == "Water":
+                level.water_rects.extend(rects)
+                level.water_tiles = layer_tiles
+            elif layer_name in ("Quicksand", "Sand"):
+                level.quicksand_rects.extend(rects)
+                level.quicksand_tiles = layer_tiles
+
+        elif isinstance(layer, OBJECT_GROUP_TYPES):
             # объекты: платформы/враги/portal/...
             for obj in layer:
                 oname = getattr(obj, "name", "") or ""
                 oname_lower = oname.lower()
+                gid = getattr(obj, "gid", None)
                 # враги: объект с именем "Bacteria"
                 props = getattr(obj, "properties", {}) or {}
                 hp_prop = None
@@ -41,25 +154,85 @@ def load_map(filename):
                         hp_prop = None
 
                 if oname_lower == "bacteria":
-                    enemies.append({"name":"Bacteria","x":int(obj.x),"y":int(obj.y), "hp": hp_prop})
+                    level.enemies.append({"name":"Bacteria","x":int(obj.x),"y":int(obj.y), "hp": hp_prop})
                 elif oname_lower == "virus":
-                    enemies.append({"name":"Virus","x":int(obj.x),"y":int(obj.y), "hp": hp_prop})
+                    level.enemies.append({"name":"Virus","x":int(obj.x),"y":int(obj.y), "hp": hp_prop})
                 elif oname_lower == "boss":
-                    enemies.append({"name":"Boss","x":int(obj.x),"y":int(obj.y), "hp": hp_prop})
+                    level.enemies.append({"name":"Boss","x":int(obj.x),"y":int(obj.y), "hp": hp_prop})
 
                 if oname_lower == "exit":
-                    exit_rect = pygame.Rect(int(obj.x), int(obj.y), 
-                                            int(obj.width) if getattr(obj, "width", None) else TILE_SIZE,
-                                            int(obj.height) if getattr(obj, "height", None) else TILE_SIZE)
+                    level.exit_rect = pygame.Rect(int(obj.x), int(obj.y), 
+                                                  int(obj.width) if getattr(obj, "width", None) else TILE_SIZE,
+                                                  int(obj.height) if getattr(obj, "height", None) else TILE_SIZE)
+
+                # --- Портал выхода: первый объект слоя "Exit" ---
+                if lname == "exit" and level.exit_portal is None:
+                    # Объект может быть с gid (спрайт) или без, берём его координаты
+                    level.exit_portal = pygame.Rect(
+                        int(obj.x), 
+                        int(obj.y), 
+                        int(obj.width) if obj.width else TILE_SIZE, 
+                        int(obj.height) if obj.height else TILE_SIZE
+                    )
+
+                # --- Таблички с текстом (property "text") ---
+                if lname == "info":
+                    text = props.get("text", "") or props.get("Text", "") or ""
+                    obj_w = int(getattr(obj, "width", TILE_SIZE))
+                    obj_h = int(getattr(obj, "height", TILE_SIZE))
+                    rect_y = int(obj.y) - obj_h  # корректировка для tile-object
+                    level.signs.append({"rect": pygame.Rect(int(obj.x), rect_y, obj_w, obj_h), "text": text})
+
+                # --- Коллектиблы ---
+                is_collectible = oname_lower in COLLECTIBLE_NAMES
+                if lname in ("collectibles", "pickups") and is_collectible:
+                    obj_w = int(obj.width) if getattr(obj, "width", None) else TILE_SIZE
+                    obj_h = int(obj.height) if getattr(obj, "height", None) else TILE_SIZE
+                    rect_x = int(obj.x)
+                    rect_y = int(obj.y) - obj_h  # корректировка для tile-объекта
+                    rect = pygame.Rect(rect_x, rect_y, obj_w, obj_h)
+                    value = int(props.get("value", 1)) if oname_lower != "medkit" else 1
+
+                    img = tmx_data.get_tile_image_by_gid(gid) if gid else None
+                    draw_x = rect_x
+                    draw_y = rect_y
+                    if img:
+                        tile_x = int(obj.x) // TILE_SIZE
+                        tile_y = int(obj.y) // TILE_SIZE
+                        draw_x = tile_x * TILE_SIZE
+                        draw_y = tile_y * TILE_SIZE + TILE_SIZE - img.get_height()
+
+                    level.collectibles.append({
+                        "type": oname_lower,
+                        "rect": rect,
+                        "gid": gid,
+                        "image": img,
+                        "value": value,
+                        "draw": (draw_x, draw_y)
+                    })
+
+                # --- Статические декорации (tile-объекты) ---
+                # платформы, выход и коллектиблы рисуются отдельно
+                if gid and not (
+                    lname in PLATFORM_LAYERS or oname_lower == "movingplatform"
+                    or oname_lower == "exit"
+                    or (lname == "collectibles" and is_collectible)
+                ):
+                    img = tmx_data.get_tile_image_by_gid(gid)
+                    if img:
+                        # выравниваем позицию по сетке тайлов
+                        tile_x = int(obj.x) // TILE_SIZE
+                        tile_y = int(obj.y) // TILE_SIZE
+                        level.decorations.append(
+                            (img, (tile_x * TILE_SIZE, tile_y * TILE_SIZE + TILE_SIZE - img.get_height())))
+
                 # --- Платформы: более надёжное определение/корректное позиционирование ---
                 obj_type = (getattr(obj, "type", None) or "").lower()
-                layer_name = getattr(layer, "name", "") or ""
-                layer_name = layer_name.lower()
 
                 is_moving_platform = (
                     obj_type == "movingplatform"
                     or oname_lower == "movingplatform"
-                    or layer_name in ("movingplatform", "movingplatforms", "platforms")
+                    or lname in PLATFORM_LAYERS
                 )
 
                 if is_moving_platform:
@@ -68,12 +241,9 @@ def load_map(filename):
                     obj_h = int(obj.height) if getattr(obj, "height", None) else TILE_SIZE
 
                     # Если объект — tile/object с gid, возьмём изображение
-                    gid = getattr(obj, "gid", None)
                     image = None
                     if gid:
                         image = tmx_data.get_tile_image_by_gid(gid)
-                        # pytmx возвращает Surface; преобразуем в pygame.Surface если нужно
-                        # (обычно get_tile_image_by_gid уже возвращает Surface)
                     
                     # Учитываем, что для tile-объекта obj.y указывает на нижнюю границу,
                     # поэтому сдвигаем y вверх на высоту объекта
@@ -83,7 +253,6 @@ def load_map(filename):
                     rect = pygame.Rect(rect_x, rect_y, obj_w, obj_h)
 
                     # чтение свойств direction/speed/distance из obj.properties, если есть
-                    props = getattr(obj, "properties", {}) or {}
                     direction = props.get("direction", "horizontal")
                     try:
                         speed = float(props.get("speed", 1))
@@ -94,5 +263,24 @@ def load_map(filename):
                     except Exception:
                         distance = TILE_SIZE
 
-                    platforms.append(MovingPlatform(rect, direction, speed, distance, image=image, name=oname))
-    return tmx_data, tiles, traps, platforms, enemies, exit_rect
\ No newline at end of file
+                    level.platforms.append(MovingPlatform(rect, direction, speed, distance, image=image, name=oname))
+
+    # склеиваем коллайдеры каждого слоя отдельно (земля с песком не смешиваются).
+    # Твёрдые слои — только в горизонтальные отрезки высотой в тайл: по нижней
+    # границе препятствия Bacteria.can_move_forward решает, запрыгнуть ли на
+    # ступеньку, и столбец из нескольких тайлов выглядел бы для неё стеной
+    tiles = []
+    traps = []
+    for name, rects in layer_rects.items():
+        merged = merge_tile_rects(rects, vertical=name == "traps") if merge else rects
+        level.merge_stats[name] = (len(rects), len(merged))
+        if name == "traps":
+            traps.extend(merged)
+        else:
+            tiles.extend(merged)
+
+    # сетки коллизий: сущности спрашивают только соседние ячейки, а не весь список
+    level.colliders = CollisionGrid(tiles)
+    level.hazards = CollisionGrid(traps)
+    level.solid_cells = level.colliders.occupancy()
+    return level
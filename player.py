@@ -1,5 +1,6 @@
 import pygame
 from constants import *
+from sim_clock import get_ticks
 
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y, map_height, sprites):
@@ -31,16 +32,15 @@ class Player(pygame.sprite.Sprite):
         self.mana = 1.0 if self.diamonds > 0 else 0.0
         self.mana_duration_ms = 10_000  # 10 секунд полного расхода
         self.mana_drain_per_ms = 1.0 / self.mana_duration_ms
-        self.last_mana_tick = pygame.time.get_ticks()
+        self.last_mana_tick = get_ticks()
 
         # Параметры оружия/снарядов (по умолчанию)
         self.projectile_damage = 1
         self.proj_img = None  # при подборе ammo устано
 
 
-    def update(self, tiles, traps, in_water=False, in_quicksand=False):
-        import pygame
-        keys = pygame.key.get_pressed()
+    def update(self, tiles, traps, controls, in_water=False, in_quicksand=False):
+        # controls — game_session.InputState: кнопки передаются снаружи, а не опрашиваются
         dx = 0
 
         # базовая скорость
@@ -51,11 +51,11 @@ class Player(pygame.sprite.Sprite):
             base_speed = max(1, int(base_speed * 0.25))
 
         # ==== МАНА / ЩИТ ====
-        now = pygame.time.get_ticks()
+        now = get_ticks()
         elapsed = max(0, now - getattr(self, "last_mana_tick", now))
         self.last_mana_tick = now
 
-        shift_pressed = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
+        shift_pressed = controls.shield
 
         # Если держим Shift и есть манa — включаем щит и расходуем
         if shift_pressed and self.mana > 0:
@@ -90,21 +90,21 @@ class Player(pygame.sprite.Sprite):
 
         # анимация/движение
         current_img = self.sprites["idle"]
-        if keys[pygame.K_a]:
+        if controls.left:
             #print("AAAAAAA")
             dx = -base_speed
-            current_img = self.sprites["walk1"] if pygame.time.get_ticks() // 200 % 2 == 0 else self.sprites["walk2"]
+            current_img = self.sprites["walk1"] if get_ticks() // 200 % 2 == 0 else self.sprites["walk2"]
             self.facing_right = False
-        elif keys[pygame.K_d]:
+        elif controls.right:
             #print("DDDDDDdd")
             dx = base_speed
-            current_img = self.sprites["walk1"] if pygame.time.get_ticks() // 200 % 2 == 0 else self.sprites["walk2"]
+            current_img = self.sprites["walk1"] if get_ticks() // 200 % 2 == 0 else self.sprites["walk2"]
             self.facing_right = True
         elif self.shield_active:
             current_img = self.sprites["shift"]
 
         # прыжок (запрещаем на зыбучих песках)
-        if keys[pygame.K_SPACE] and self.on_ground and not in_quicksand:
+        if controls.jump and self.on_ground and not in_quicksand:
             self.vel_y = -15
             self.on_ground = False
             current_img = self.sprites.get("jump", current_img)
@@ -118,32 +118,30 @@ class Player(pygame.sprite.Sprite):
         # горизонтальная коллизия (по hitbox)
         future_x = self.hitbox.copy()
         future_x.x += dx
-        for tile in tiles:
-            if isinstance(tile, pygame.Rect) and tile.colliderect(future_x):
-                if dx > 0:
-                    self.hitbox.right = tile.left
-                elif dx < 0:
-                    self.hitbox.left = tile.right
-                dx = 0
-                break
+        tile = tiles.first(future_x)
+        if tile is not None:
+            if dx > 0:
+                self.hitbox.right = tile.left
+            elif dx < 0:
+                self.hitbox.left = tile.right
+            dx = 0
 
         # вертикальная коллизия (по hitbox)
         future_y = self.hitbox.copy()
         future_y.y += dy
         collided_vert = False
-        for tile in tiles:
-            if isinstance(tile, pygame.Rect) and tile.colliderect(future_y):
-                collided_vert = True
-                if dy > 0:
-                    # падаем вниз — ставим на поверхность и считаем на земле
-                    self.hitbox.bottom = tile.top
-                    self.vel_y = 0
-                    self.on_ground = True
-                elif dy < 0:
-                    self.hitbox.top = tile.bottom
-                    self.vel_y = 0
-                dy = 0
-                break
+        tile = tiles.first(future_y)
+        if tile is not None:
+            collided_vert = True
+            if dy > 0:
+                # падаем вниз — ставим на поверхность и считаем на земле
+                self.hitbox.bottom = tile.top
+                self.vel_y = 0
+                self.on_ground = True
+            elif dy < 0:
+                self.hitbox.top = tile.bottom
+                self.vel_y = 0
+            dy = 0
 
         # применяем движение
         self.hitbox.x += dx
@@ -151,39 +149,31 @@ class Player(pygame.sprite.Sprite):
 
         # Если не было вертикального столкновения — проверяем опору точечно (под центром ступни).
         # Это гарантирует, что при стоянии на краю (частичная опора) будет корректно обнаружено наличие/отсутствие земли.
-        on_ground_precise = False
         # небольшая область под ногами
         foot_rect = pygame.Rect(self.hitbox.left + 2, self.hitbox.bottom, max(1, self.hitbox.width - 4), 3)
-        for tile in tiles:
-            if not isinstance(tile, pygame.Rect):
-                continue
-            # 1) прямое пересечение небольшой области под ногами
-            if tile.colliderect(foot_rect):
-                on_ground_precise = True
-                break
-            # 2) дополнительно проверяем точки по краям — чтобы не потерять опору на краю тайла
-            if tile.collidepoint((self.hitbox.left + 2, self.hitbox.bottom + 1)) or \
-               tile.collidepoint((self.hitbox.right - 2, self.hitbox.bottom + 1)) or \
-               tile.collidepoint((self.hitbox.centerx, self.hitbox.bottom + 1)):
-                on_ground_precise = True
-                break
+        # 1) прямое пересечение небольшой области под ногами
+        on_ground_precise = tiles.first(foot_rect) is not None
+        # 2) дополнительно проверяем точки по краям — чтобы не потерять опору на краю тайла
+        if not on_ground_precise:
+            on_ground_precise = (
+                tiles.collidepoint((self.hitbox.left + 2, self.hitbox.bottom + 1)) or
+                tiles.collidepoint((self.hitbox.right - 2, self.hitbox.bottom + 1)) or
+                tiles.collidepoint((self.hitbox.centerx, self.hitbox.bottom + 1))
+            )
         self.on_ground = on_ground_precise
 
         # ловушки (по hitbox)
-        now = pygame.time.get_ticks()
-        for trap in traps:
-            trect = trap if isinstance(trap, pygame.Rect) else getattr(trap, "rect", None)
-            if isinstance(trect, pygame.Rect):
-                if trect.colliderect(self.hitbox):
-                    if now - self.last_hit_time > self.invincible_delay:
-                        self.hp -= 1
-                        #HIT_SOUND.play()
-                        self.last_hit_time = now
-                        if self.hp <= 0:
-                            try:
-                                self.hp=0
-                            except NameError:
-                                pygame.event.post(pygame.event.Event(pygame.QUIT))
+        now = get_ticks()
+        for trect in traps.query(self.hitbox):
+            if now - self.last_hit_time > self.invincible_delay:
+                self.hp -= 1
+                #HIT_SOUND.play()
+                self.last_hit_time = now
+                if self.hp <= 0:
+                    try:
+                        self.hp=0
+                    except NameError:
+                        pygame.event.post(pygame.event.Event(pygame.QUIT))
 
         # падение за карту
         if self.hitbox.top > self.map_height:
@@ -202,9 +192,6 @@ class Player(pygame.sprite.Sprite):
             self.fall_start_time = None
 
         # синхронизация визуала с хитбоксом
-        if not self.facing_right:
-            self.image = pygame.transform.flip(current_img, True, False)
-        else:
-            self.image = current_img
+        self.image = self.sprites.facing(current_img, self.facing_right)
         self.rect = self.image.get_rect(midbottom=self.hitbox.midbottom)
 # ...existing code...
\ No newline at end of file
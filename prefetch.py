@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import LEVELS, BACKGROUNDS, FON_MUSIC, SCREEN_WIDTH, SCREEN_HEIGHT
+from level_cache import prepare_level
+from image_cache import images
+
+
+def load_level_assets(level_index):
+    """Всё тяжёлое для старта уровня, что можно сделать вне главного потока.
+
+    Карта компилируется/открывается без создания картинок, фон декодируется
+    и масштабируется в кеш картинок (convert() делается уже в главном потоке),
+    музыка читается в память целиком.
+    """
+    level_file = LEVELS[level_index]
+    prepare_level(level_file)
+
+    bg_path = BACKGROUNDS[level_index % len(BACKGROUNDS)]
+    bg_size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+    if not images.cached(bg_path, "convert", bg_size):
+        images.load(bg_path, size=bg_size)
+
+    music_path = FON_MUSIC[level_index]
+    with open(music_path, "rb") as f:
+        music = f.read()
+
+    return {
+        "background": bg_path,
+        "music": music,
+        "music_hint": os.path.splitext(music_path)[1].lstrip("."),
+    }
+
+
+class LevelPrefetcher:
+    """Фоновая загрузка следующего уровня, пока играется текущий"""
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self.pending = {}  # индекс уровня -> Future
+
+    def request(self, level_index):
+        if level_index not in self.pending:
+            self.pending[level_index] = self.executor.submit(load_level_assets, level_index)
+
+    def ready(self, level_index):
+        """Предзагрузка уровня закончилась (или её не запрашивали)"""
+        future = self.pending.get(level_index)
+        return future is None or future.done()
+
+    def take(self, level_index):
+        """Данные уровня: готовые из предзагрузки или загруженные сейчас"""
+        future = self.pending.pop(level_index, None)
+        if future is not None and not future.cancel():
+            # загрузка уже идёт или закончилась — дождаться дешевле, чем начинать заново
+            try:
+                return future.result()
+            except Exception:
+                pass
+        # предзагрузку не запрашивали, она не успела начаться или упала
+        return load_level_assets(level_index)
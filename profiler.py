@@ -0,0 +1,134 @@
+import time
+from collections import deque
+
+import pygame
+
+from constants import FPS, PROFILE_FRAMES
+from text_cache import get_font
+
+# Замер фаз кадра (F3 в игре). Фазы отмечаются цепочкой:
+#     t = profiler.now()
+#     ...              # работа фазы
+#     t = profiler.lap("enemies", t)
+# Выключенный профайлер возвращает 0 без обращения к часам, так что
+# цена замеров в обычной игре — один вызов метода на фазу.
+# profiler.info["подпись"] = функция — строка состояния под таблицей фаз
+# (вызывается только при обновлении оверлея).
+
+GRAPH_HEIGHT = 60
+REFRESH_FRAMES = 15  # текст оверлея обновляется раз в столько кадров
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+class FrameProfiler:
+    """Скользящие замеры последних PROFILE_FRAMES кадров: время кадра и фаз (мс)"""
+    def __init__(self, history=PROFILE_FRAMES):
+        self.enabled = False
+        self.samples = deque(maxlen=history)  # (мс кадра, {фаза: мс})
+        self.phases = []  # фазы в порядке первого появления
+        self._frame = {}
+        self._frame_start = None
+        self.info = {}  # подпись -> функция, возвращающая строку для оверлея
+        self._lines = []  # отрисованные строки оверлея
+        self._since_refresh = 0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.samples.clear()
+        self._frame = {}
+        self._frame_start = None
+        self._lines = []
+
+    def now(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def lap(self, phase, t):
+        """Добавить к фазе время с момента t; возвращает начало следующей фазы"""
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        frame = self._frame
+        if phase not in frame and phase not in self.phases:
+            self.phases.append(phase)
+        frame[phase] = frame.get(phase, 0.0) + (now - t) * 1000
+        return now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.samples.append(((now - self._frame_start) * 1000, self._frame))
+        self._frame = {}
+        self._frame_start = now
+        self._since_refresh += 1
+
+    def stats(self):
+        """p50/p95/p99 времени кадра и среднее/p95 по фазам за окно"""
+        frames = sorted(ms for ms, _ in self.samples)
+        n = len(frames) or 1
+        phases = {}
+        for phase in self.phases:
+            values = sorted(p.get(phase, 0.0) for _, p in self.samples)
+            phases[phase] = (sum(values) / n, percentile(values, 95))
+        return {
+            "frames": len(frames),
+            "p50": percentile(frames, 50),
+            "p95": percentile(frames, 95),
+            "p99": percentile(frames, 99),
+            "phases": phases,
+        }
+
+    def _refresh(self):
+        s = self.stats()
+        lines = [f"frame  p50 {s['p50']:5.1f}  p95 {s['p95']:5.1f}  p99 {s['p99']:5.1f} ms  ({s['frames']})"]
+        measured = 0.0
+        for phase, (avg, p95) in s["phases"].items():
+            measured += avg
+            lines.append(f"{phase:12} {avg:6.2f}  p95 {p95:6.2f}")
+        if s["frames"]:
+            mean = sum(ms for ms, _ in self.samples) / s["frames"]
+            lines.append(f"{'other':12} {max(0.0, mean - measured):6.2f}")
+        for label, source in self.info.items():
+            lines.append(f"{label:12} {source()}")
+        # свои поверхности, мимо общего LRU render_text: меняющиеся цифры
+        # вытесняли бы из него строки HUD и искажали замеры
+        font = get_font(18)
+        self._lines = [font.render(line, True, (220, 220, 220)) for line in lines]
+        self._since_refresh = 0
+
+    def draw(self, screen, pos=(10, 200)):
+        """Оверлей: таблица фаз и график времени последних кадров"""
+        if not self.enabled:
+            return
+        if not self._lines or self._since_refresh >= REFRESH_FRAMES:
+            self._refresh()
+        x, y = pos
+        width = self.samples.maxlen
+        height = GRAPH_HEIGHT + 8 + 18 * len(self._lines)
+        text_width = max(line.get_width() for line in self._lines)
+        panel = pygame.Rect(x - 6, y - 6, max(width, 330, text_width) + 12, height + 12)
+        screen.fill((0, 0, 0), panel)
+        for line in self._lines:
+            screen.blit(line, (x, y))
+            y += 18
+        y += 8
+        # график: столбик на кадр, линии — бюджет кадра при FPS и вдвое больше
+        budget = 1000 / FPS
+        scale = GRAPH_HEIGHT / (budget * 3)
+        bottom = y + GRAPH_HEIGHT
+        for i, (ms, _) in enumerate(self.samples):
+            h = min(GRAPH_HEIGHT, int(ms * scale))
+            color = (90, 200, 90) if ms <= budget * 1.2 else (230, 200, 60) if ms <= budget * 2 else (230, 70, 60)
+            pygame.draw.line(screen, color, (x + i, bottom), (x + i, bottom - h))
+        for mult in (1, 2):
+            ly = bottom - int(budget * mult * scale)
+            pygame.draw.line(screen, (120, 120, 160), (x, ly), (x + width, ly))
+
+
+profiler = FrameProfiler()
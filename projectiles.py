@@ -0,0 +1,162 @@
+import numpy as np
+import pygame
+
+from constants import TILE_SIZE
+from sim_clock import get_ticks
+
+
+class ProjectilePool:
+    """Все снаряды одной стороны в массивах NumPy (structure of arrays).
+
+    Поведение то же, что у прежнего класса Projectile: прямоугольник
+    центрирован по int(позиции), размером с картинку или size x size;
+    снаряд с картинкой рисуется картинкой, без неё — залитым прямоугольником.
+    Обновление, проверка срока жизни и попаданий идут векторно, мёртвые
+    снаряды удаляются одним сжатием массивов.
+
+    terrain — bool-массив твёрдых ячеек [строка, столбец]: снаряд, центр
+    которого попал в такую ячейку, гаснет. limit — сколько снарядов
+    может жить одновременно; при переполнении вытесняются самые старые.
+    """
+    def __init__(self, capacity=64, limit=None, terrain=None, cell_size=TILE_SIZE):
+        self.count = 0
+        self.limit = limit
+        self.terrain = terrain
+        self.cell_size = cell_size
+        self.evicted = 0  # сколько снарядов вытеснено лимитом
+        self.images = []  # id спрайта -> Surface
+        self._image_ids = {}  # id(Surface) -> id спрайта
+        self._alloc(capacity if limit is None else min(capacity, limit))
+
+    def _alloc(self, capacity):
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.prev = np.zeros((capacity, 2), dtype=np.float64)  # позиция до последнего шага
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.spawn_time = np.zeros(capacity, dtype=np.int64)
+        self.life = np.zeros(capacity, dtype=np.int64)
+        self.size = np.zeros((capacity, 2), dtype=np.int32)  # ширина/высота прямоугольника
+        self.sprite = np.full(capacity, -1, dtype=np.int32)  # -1 — рисовать прямоугольник
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+
+    def _arrays(self):
+        return (self.pos, self.prev, self.vel, self.spawn_time, self.life, self.size, self.sprite, self.color)
+
+    def _grow(self):
+        old = self._arrays()
+        capacity = len(self.pos) * 2
+        if self.limit is not None:
+            capacity = min(capacity, self.limit)
+        self._alloc(capacity)
+        for dst, src in zip(self._arrays(), old):
+            dst[:self.count] = src[:self.count]
+
+    def _drop_oldest(self, k):
+        # снаряды лежат в порядке появления — старейшие в начале
+        n = self.count
+        for arr in self._arrays():
+            arr[:n - k] = arr[k:n]
+        self.count = n - k
+        self.evicted += k
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, vx, vy, color=(0, 255, 0), life=3000, image=None, size=8):
+        if self.limit is not None and self.count >= self.limit:
+            self._drop_oldest(self.count - self.limit + 1)
+        if self.count == len(self.pos):
+            self._grow()
+        i = self.count
+        self.pos[i] = self.prev[i] = (x, y)
+        self.vel[i] = (vx, vy)
+        self.spawn_time[i] = get_ticks()
+        self.life[i] = life
+        self.color[i] = color[:3]
+        if image is not None:
+            sprite = self._image_ids.get(id(image))
+            if sprite is None:
+                sprite = self._image_ids[id(image)] = len(self.images)
+                self.images.append(image)
+            self.sprite[i] = sprite
+            self.size[i] = image.get_size()
+        else:
+            self.sprite[i] = -1
+            size = max(1, int(size))
+            self.size[i] = (size, size)
+        self.count += 1
+
+    def update(self, dt):
+        """Сдвигает все снаряды; возвращает маску истёкших по времени или врезавшихся в стену"""
+        n = self.count
+        self.prev[:n] = self.pos[:n]
+        self.pos[:n] += self.vel[:n] * dt
+        spent = get_ticks() - self.spawn_time[:n] > self.life[:n]
+        if self.terrain is not None and self.terrain.size:
+            cell = np.floor_divide(self.pos[:n], self.cell_size).astype(np.int64)
+            cx = cell[:, 0]
+            cy = cell[:, 1]
+            rows, cols = self.terrain.shape
+            inside = (cx >= 0) & (cx < cols) & (cy >= 0) & (cy < rows)
+            spent[inside] |= self.terrain[cy[inside], cx[inside]]
+        return spent
+
+    def rects(self, alpha=1.0):
+        """Левый верх и размеры прямоугольников как массивы (x, y, w, h).
+
+        alpha < 1 — положение между предыдущим и текущим шагом (для отрисовки).
+        """
+        n = self.count
+        pos = self.pos[:n]
+        if alpha < 1.0:
+            pos = self.prev[:n] + (pos - self.prev[:n]) * alpha
+        center = pos.astype(np.int64)  # int() отбрасывает дробь, как в Rect
+        w = self.size[:n, 0]
+        h = self.size[:n, 1]
+        return center[:, 0] - w // 2, center[:, 1] - h // 2, w, h
+
+    def rect(self, i):
+        x, y = int(self.pos[i, 0]), int(self.pos[i, 1])
+        w, h = int(self.size[i, 0]), int(self.size[i, 1])
+        return pygame.Rect(x - w // 2, y - h // 2, w, h)
+
+    def collide(self, rect):
+        """Маска снарядов, пересекающих rect (та же проверка, что colliderect)"""
+        x, y, w, h = self.rects()
+        if rect.width <= 0 or rect.height <= 0:
+            return np.zeros(self.count, dtype=bool)
+        return ((x < rect.right) & (x + w > rect.left)
+                & (y < rect.bottom) & (y + h > rect.top))
+
+    def remove(self, mask):
+        """Удаляет отмеченные снаряды, сохраняя порядок остальных"""
+        if not mask.any():
+            return
+        keep = np.flatnonzero(~mask)
+        k = len(keep)
+        for arr in self._arrays():
+            arr[:k] = arr[keep]
+        self.count = k
+
+    def clear(self):
+        self.count = 0
+
+    def draw(self, surf, offset, alpha=1.0):
+        if not self.count:
+            return
+        x, y, w, h = self.rects(alpha)
+        x = (x + offset[0]).tolist()
+        y = (y + offset[1]).tolist()
+        w = w.tolist()
+        h = h.tolist()
+        sprite = self.sprite[:self.count].tolist()
+        if min(sprite) >= 0:
+            # только картинки — одним вызовом blits
+            images = self.images
+            surf.blits([(images[s], (x[i], y[i])) for i, s in enumerate(sprite)], doreturn=False)
+            return
+        colors = self.color[:self.count].tolist()
+        for i, s in enumerate(sprite):
+            if s >= 0:
+                surf.blit(self.images[s], (x[i], y[i]))
+            else:
+                pygame.draw.rect(surf, colors[i], (x[i], y[i], w[i], h[i]))
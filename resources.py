@@ -0,0 +1,84 @@
+from constants import TILE_SIZE, CHAR_SIZE
+from sprite_bank import SpriteBank
+from image_cache import images
+from atlas import Atlas, build_pages
+from bake import baked_atlas
+
+
+# Кадры по группам: имя -> (лист, x, y, w, h), x и y — номер кадра в листе.
+# Все кадры собираются в один атлас (bake.py запекает его заранее).
+SPRITE_FRAMES = {
+    # === Спрайты персонажа ===
+    "player": {
+        "walk1": ("assets/character/2.png", 0, 0, CHAR_SIZE, CHAR_SIZE),
+        "walk2": ("assets/character/3.png", 0, 0, CHAR_SIZE, CHAR_SIZE),
+        "jump": ("assets/character/4.png", 0, 0, CHAR_SIZE, CHAR_SIZE),
+        "idle": ("assets/character/1.png", 0, 0, CHAR_SIZE, CHAR_SIZE),
+        "shift": ("assets/character/5.png", 0, 0, CHAR_SIZE, CHAR_SIZE),
+    },
+    # === Спрайты босса ===
+    "boss": {
+        "idle1": ("assets/Boss-1.png", 0, 0, 256, 256),
+        "idle2": ("assets/Boss-2.png", 0, 0, 256, 256),
+    },
+    # === Спрайты врагов ===
+    "bacteria": {
+        "idle": ("assets/bacteria/b1.png", 0, 0, TILE_SIZE, TILE_SIZE),
+        "walk1": ("assets/bacteria/b2.png", 0, 0, TILE_SIZE, TILE_SIZE),
+        "walk2": ("assets/bacteria/b3.png", 0, 0, TILE_SIZE, TILE_SIZE),
+    },
+    "virus": {
+        "idle": ("assets/virus/v3.png", 0, 0, TILE_SIZE, TILE_SIZE),
+        "walk1": ("assets/virus/v2.png", 0, 0, TILE_SIZE, TILE_SIZE),
+        "walk2": ("assets/virus/v1.png", 0, 0, TILE_SIZE, TILE_SIZE),
+    },
+    # снаряды игрока: обычный и после подбора ammo
+    "shots": {
+        "proj1": ("assets/fire.png", 0, 0, TILE_SIZE, TILE_SIZE),
+        "proj2": ("assets/fire.png", 0, 1, TILE_SIZE, TILE_SIZE),
+    },
+    "tiles": {
+        "heart": ("assets/ground.png", 13, 17, TILE_SIZE, TILE_SIZE),
+    },
+}
+
+
+def atlas_specs():
+    """Все кадры под именами «группа/кадр»"""
+    return {f"{group}/{name}": spec
+            for group, frames in SPRITE_FRAMES.items() for name, spec in frames.items()}
+
+
+def load_atlas():
+    """Атлас из запечённых страниц, а если их нет или они устарели — собранный из листов"""
+    specs = atlas_specs()
+    baked = baked_atlas(specs)
+    if baked is None:
+        pages, rects = build_pages(specs, lambda path: images.load(path, "alpha"))
+        baked = [page.convert_alpha() for page in pages], rects
+    return Atlas(*baked)
+
+
+class Resources:
+    """Спрайты, общие для всех уровней. Нужен уже созданный display (convert_alpha)"""
+    def __init__(self):
+        self.atlas = atlas = load_atlas()
+        self.player_sprites = SpriteBank(atlas.group("player"))
+        self.boss_sprites = SpriteBank(atlas.group("boss"))
+        # отражённые кадры врагов готовятся один раз на всю игру
+        self.bacteria_sprites = SpriteBank(atlas.group("bacteria"))
+        self.virus_sprites = SpriteBank(atlas.group("virus"))
+        self.proj_img1 = atlas["shots/proj1"]
+        self.proj_img2 = atlas["shots/proj2"]
+        self.tile_heart = atlas["tiles/heart"]
+
+
+_resources = None
+
+
+def get_resources():
+    """Общие спрайты: загружаются при первом обращении и дальше переиспользуются"""
+    global _resources
+    if _resources is None:
+        _resources = Resources()
+    return _resources
@@ -0,0 +1,81 @@
+from constants import SIM_RATE, MAX_SIM_STEPS
+
+# Игровое время (мс): идёт только вместе с шагами симуляции (GameSession.step), поэтому
+# перезарядки, анимации и срок жизни снарядов не зависят от частоты кадров.
+_now_ms = 0.0
+
+
+def get_ticks():
+    """Замена pygame.time.get_ticks() для игровой логики"""
+    return int(_now_ms)
+
+
+def advance(ms):
+    global _now_ms
+    _now_ms += ms
+
+
+def reset(ms=0.0):
+    """Начать игровое время заново (повторяемые прогоны без окна)"""
+    global _now_ms
+    _now_ms = float(ms)
+
+
+class FixedStep:
+    """Аккумулятор фиксированного шага симуляции.
+
+    Реальное время кадра копится и расходуется целыми шагами по step_ms;
+    остаток (alpha — доля шага) нужен для интерполяции при отрисовке.
+    Если кадр был слишком долгим, шагов делается не больше max_steps,
+    а лишнее отставание выбрасывается — игра замедляется, но не зависает.
+    """
+    def __init__(self, rate=SIM_RATE, max_steps=MAX_SIM_STEPS):
+        self.step_ms = 1000.0 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped = 0  # сколько шагов выброшено из-за лимита догоняния
+
+    def steps(self, frame_ms):
+        """Итератор по шагам симуляции, положенным на этот кадр"""
+        self.accumulator += frame_ms
+        n = int(self.accumulator // self.step_ms)
+        if n > self.max_steps:
+            self.dropped += n - self.max_steps
+            n = self.max_steps
+            self.accumulator %= self.step_ms
+        else:
+            self.accumulator -= n * self.step_ms
+        for _ in range(n):
+            yield
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.step_ms
+
+
+class Interpolator:
+    """Положения объектов до последнего шага — для плавной отрисовки между шагами"""
+    def __init__(self):
+        self.prev = {}  # id(объект) -> (объект, x, y)
+        self.alpha = 1.0
+
+    def snapshot(self, objects):
+        self.prev = {id(o): (o, o.rect.x, o.rect.y) for o in objects}
+
+    def _lag(self, obj):
+        # насколько объект «впереди» отрисовываемого положения
+        entry = self.prev.get(id(obj))
+        if entry is None or entry[0] is not obj:
+            return 0, 0
+        k = 1.0 - self.alpha
+        return round((obj.rect.x - entry[1]) * k), round((obj.rect.y - entry[2]) * k)
+
+    def offset(self, obj, view):
+        """Смещение отрисовки объекта: камера плюс откат к промежуточному положению"""
+        lx, ly = self._lag(obj)
+        return view[0] - lx, view[1] - ly
+
+    def view(self, camera, target):
+        """Смещение камеры, следящей за target, в промежуточный момент"""
+        lx, ly = self._lag(target)
+        return camera.offset_x + lx, camera.offset_y + ly
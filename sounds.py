@@ -0,0 +1,243 @@
+"""Звуковые эффекты: загрузка при первом использовании или в фоне.
+
+Декодирование mp3 — самая долгая часть запуска, поэтому эффекты не грузятся
+при импорте constants. Раскодированный PCM можно сохранить на диск
+(SOUND_CACHE_DIR): при следующих запусках звук создаётся прямо из буфера.
+
+Запуск идёт через VoiceManager: у каждой группы свои каналы, частые эффекты
+прореживаются, эффекты за пределами экрана отбрасываются.
+
+    python3 sounds.py   # загрузить всё и показать время по каждому эффекту
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import pygame
+
+from constants import (SOUND_FILES, SOUND_VOLUME, SOUND_CACHE_DIR,
+                       SOUND_GROUPS, SOUND_RULES, SOUND_CULL_MARGIN)
+
+
+def _cache_path(filename, mixer_format):
+    # ключ: содержимое mp3 и формат микшера (частота, размер сэмпла, каналы)
+    with open(filename, "rb") as f:
+        digest = hashlib.sha1(f.read())
+    digest.update(repr(mixer_format).encode())
+    name = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(SOUND_CACHE_DIR, f"{name}-{digest.hexdigest()[:16]}.pcm")
+
+
+class SoundRegistry:
+    """Эффекты по имени; каждый декодируется один раз.
+
+    stats: имя -> (мс на загрузку, источник "mp3" или "pcm").
+    """
+    def __init__(self, files=SOUND_FILES, volume=SOUND_VOLUME, cache_dir=SOUND_CACHE_DIR):
+        self.files = files
+        self.volume = volume
+        self.cache_dir = cache_dir
+        self.sounds = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _load(self, name):
+        filename = self.files[name]
+        t = time.perf_counter()
+        sound = None
+        source = "mp3"
+        path = None
+        if self.cache_dir:
+            path = _cache_path(filename, pygame.mixer.get_init())
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    sound = pygame.mixer.Sound(buffer=f.read())
+                source = "pcm"
+        if sound is None:
+            sound = pygame.mixer.Sound(filename)
+            if path:
+                self._write_cache(path, sound)
+        sound.set_volume(self.volume)
+        self.stats[name] = ((time.perf_counter() - t) * 1000, source)
+        return sound
+
+    def _write_cache(self, path, sound):
+        # у каждого писателя свой временный файл: кеш общий для процессов batch_runner;
+        # звук уже декодирован, так что неудачная запись кеша не ошибка
+        tmp = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(sound.get_raw())
+            os.replace(tmp, path)
+        except OSError:
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def get(self, name):
+        """Звук по имени; None, если микшер не запущен (прогоны без звука)"""
+        sound = self.sounds.get(name)
+        if sound is None:
+            if not pygame.mixer.get_init():
+                return None
+            with self._lock:
+                sound = self.sounds.get(name)
+                if sound is None:
+                    sound = self.sounds[name] = self._load(name)
+        return sound
+
+    def play(self, name):
+        sound = self.get(name)
+        if sound is not None:
+            sound.play()
+
+    def preload(self, names=None):
+        for name in names or self.files:
+            self.get(name)
+
+    def preload_async(self, names=None):
+        """Загрузить эффекты в фоновом потоке, не задерживая первый кадр"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.preload, args=(names,), daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def ready(self):
+        """Фоновая загрузка закончилась (или не запускалась)"""
+        return self._thread is None or not self._thread.is_alive()
+
+    def total_ms(self):
+        return sum(ms for ms, _ in self.stats.values())
+
+
+registry = SoundRegistry()
+
+
+class VoiceManager:
+    """Запуск эффектов с бюджетом каналов.
+
+    * у каждой группы (SOUND_GROUPS) свои каналы — залп врагов не займёт
+      каналы интерфейса;
+    * один эффект не запускается чаще, чем раз в min_interval мс;
+    * если свободных каналов в группе нет, вытесняется самый старый голос
+      с наименьшим приоритетом, но только не выше приоритета нового;
+    * эффекты с позицией дальше cull_margin от краёв области камеры
+      (set_view) не запускаются.
+
+    counters — счётчики запусков с последнего take_counters().
+    """
+    def __init__(self, sounds, groups=SOUND_GROUPS, rules=SOUND_RULES, cull_margin=SOUND_CULL_MARGIN):
+        self.sounds = sounds
+        self.groups = groups
+        self.rules = rules
+        self.cull_margin = cull_margin
+        self.audible = None  # мировой прямоугольник экрана с запасом cull_margin
+        self.channels = None  # группа -> [индексы каналов]; создаются при первом запуске
+        self.voices = {}  # индекс канала -> (эффект, приоритет, время запуска)
+        self.last_played = {}
+        self.counters = dict.fromkeys(("started", "throttled", "culled", "stolen", "dropped"), 0)
+
+    def _allocate(self):
+        total = sum(self.groups.values())
+        pygame.mixer.set_num_channels(max(total, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(total)  # find_channel() не тронет каналы групп
+        self.channels = {}
+        index = 0
+        for group, count in self.groups.items():
+            self.channels[group] = list(range(index, index + count))
+            index += count
+
+    def _channel_for(self, group, priority):
+        victim = None
+        for index in self.channels[group]:
+            if not pygame.mixer.Channel(index).get_busy():
+                return index
+            _, p, started = self.voices[index]
+            if victim is None or (p, started) < victim[1:]:
+                victim = (index, p, started)
+        if victim[1] > priority:
+            return None
+        self.counters["stolen"] += 1
+        return victim[0]
+
+    def set_view(self, left, top, width, height):
+        """Область камеры в мировых координатах — что сейчас на экране"""
+        m = self.cull_margin
+        if self.audible is None:
+            self.audible = pygame.Rect(0, 0, 0, 0)
+        self.audible.update(left - m, top - m, width + 2 * m, height + 2 * m)
+
+    def play(self, name, pos=None):
+        if not pygame.mixer.get_init():
+            return
+        counters = self.counters
+        if pos is not None and self.audible is not None and not self.audible.collidepoint(pos):
+            counters["culled"] += 1
+            return
+        group, priority, min_interval = self.rules[name]
+        now = time.perf_counter() * 1000
+        if now - self.last_played.get(name, -min_interval) < min_interval:
+            counters["throttled"] += 1
+            return
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        if self.channels is None:
+            self._allocate()
+        index = self._channel_for(group, priority)
+        if index is None:
+            counters["dropped"] += 1
+            return
+        pygame.mixer.Channel(index).play(sound)
+        self.voices[index] = (name, priority, now)
+        self.last_played[name] = now
+        counters["started"] += 1
+
+    def active(self):
+        """Сколько голосов звучит сейчас"""
+        if self.channels is None:
+            return 0
+        return sum(pygame.mixer.Channel(i).get_busy() for i in self.voices)
+
+    def take_counters(self):
+        """Счётчики с прошлого вызова и число звучащих голосов; счётчики обнуляются"""
+        counters = dict(self.counters, active=self.active())
+        for key in self.counters:
+            self.counters[key] = 0
+        return counters
+
+    def summary(self):
+        """Строка для оверлея F3: запуски и отказы с прошлого обновления оверлея"""
+        return "  ".join(f"{key} {value}" for key, value in self.take_counters().items())
+
+
+voices = VoiceManager(registry)
+
+
+class LazySound:
+    """Эффект по имени с интерфейсом pygame.mixer.Sound.play(); pos — мировые координаты источника"""
+    def __init__(self, name):
+        self.name = name
+
+    def play(self, pos=None):
+        voices.play(self.name, pos)
+
+
+SHOOT_SOUND = LazySound("shoot")
+HIT_SOUND = LazySound("hit")
+ENEMY_DEATH_SOUND = LazySound("enemy_death")
+LEVEL_COMPLETE_SOUND = LazySound("level_complete")
+PICKUP_SOUND = LazySound("pickup")
+HEAL_SOUND = LazySound("heal")
+
+
+if __name__ == "__main__":
+    pygame.mixer.init()
+    registry.preload()
+    for name, (ms, source) in registry.stats.items():
+        print(f"{name:15} {source:4} {ms:8.1f} ms")
+    print(f"{'total':15} {'':4} {registry.total_ms():8.1f} ms")
@@ -0,0 +1,72 @@
+import numpy as np
+import pygame
+
+from constants import TILE_SIZE
+
+
+class SpatialHash:
+    """Динамическая сетка целей (враги, босс), пересобирается каждый кадр.
+
+    Цели — любые объекты с hitbox. Снаряд проверяется только с целями из
+    ячеек, которые он задевает, а не со всем списком врагов.
+    """
+    def __init__(self, cell_size=TILE_SIZE * 2):
+        self.cell_size = cell_size
+        self.targets = []
+        self.cells = {}  # (cx, cy) -> [индексы в self.targets]
+        self.bounds = None  # общий прямоугольник всех целей
+
+    def rebuild(self, targets):
+        self.targets = list(targets)
+        self.cells.clear()
+        self.bounds = None
+        cs = self.cell_size
+        for index, target in enumerate(self.targets):
+            box = target.hitbox
+            for cy in range(box.top // cs, (box.bottom - 1) // cs + 1):
+                for cx in range(box.left // cs, (box.right - 1) // cs + 1):
+                    self.cells.setdefault((cx, cy), []).append(index)
+            self.bounds = box.copy() if self.bounds is None else self.bounds.union(box)
+
+    def hits(self, pool):
+        """Все пары (индекс снаряда, цель), которые пересекаются.
+
+        Пары идут по возрастанию индекса снаряда, а для одного снаряда —
+        в порядке целей, переданных в rebuild (сначала враги, потом босс).
+        """
+        if not self.targets or not len(pool):
+            return []
+        x, y, w, h = pool.rects()
+        b = self.bounds
+        # снаряды вдали от всех целей отсекаются одной векторной проверкой
+        near = np.flatnonzero((x < b.right) & (x + w > b.left) & (y < b.bottom) & (y + h > b.top))
+        if not len(near):
+            return []
+        cs = self.cell_size
+        x = x[near]
+        y = y[near]
+        w = w[near]
+        h = h[near]
+        cells_x0 = (x // cs).tolist()
+        cells_x1 = ((x + w - 1) // cs).tolist()
+        cells_y0 = (y // cs).tolist()
+        cells_y1 = ((y + h - 1) // cs).tolist()
+        x, y, w, h = x.tolist(), y.tolist(), w.tolist(), h.tolist()
+
+        cells = self.cells
+        targets = self.targets
+        pairs = []
+        for k, i in enumerate(near.tolist()):
+            found = set()
+            for cy in range(cells_y0[k], cells_y1[k] + 1):
+                for cx in range(cells_x0[k], cells_x1[k] + 1):
+                    indices = cells.get((cx, cy))
+                    if indices:
+                        found.update(indices)
+            if not found:
+                continue
+            rect = pygame.Rect(x[k], y[k], w[k], h[k])
+            for j in sorted(found):
+                if rect.colliderect(targets[j].hitbox):
+                    pairs.append((i, targets[j]))
+        return pairs
@@ -0,0 +1,38 @@
+import pygame
+
+
+class SpriteBank(dict):
+    """Набор кадров персонажа с заранее отражёнными копиями.
+
+    Ведёт себя как обычный словарь имя -> Surface; смотрящие влево кадры
+    считаются один раз при создании, так что update() только выбирает
+    готовую поверхность.
+    """
+    def __init__(self, sprites, size=None):
+        if size is not None:
+            sprites = {name: pygame.transform.scale(img, size) for name, img in sprites.items()}
+        super().__init__(sprites)
+        self._left = {}  # id(кадр) -> (кадр, отражённый кадр)
+        self._scaled = {}  # размер -> SpriteBank
+        for img in self.values():
+            self._mirror(img)
+
+    def _mirror(self, img):
+        entry = self._left.get(id(img))
+        if entry is None:
+            # кадр держим в записи, чтобы его id не переиспользовался
+            entry = self._left[id(img)] = (img, pygame.transform.flip(img, True, False))
+        return entry[1]
+
+    def facing(self, img, facing_right):
+        """Кадр, повёрнутый в сторону взгляда"""
+        if facing_right or img is None:
+            return img
+        return self._mirror(img)
+
+    def scaled(self, size):
+        """Тот же набор в другом размере (считается один раз на размер)"""
+        bank = self._scaled.get(size)
+        if bank is None:
+            bank = self._scaled[size] = SpriteBank(self, size)
+        return bank
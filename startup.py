@@ -0,0 +1,85 @@
+"""Замер запуска игры по этапам и экран загрузки.
+
+Каждый запуск main.py дописывает строку JSON в STARTUP_LOG: длительность
+этапов (мс) и отметки от старта процесса — первый кадр экрана загрузки
+(first_frame) и первый кадр уровня (first_game_frame). По этому файлу
+время до первого кадра сравнивается между версиями.
+"""
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+import pygame
+
+from text_cache import render_text
+
+
+class StartupTimer:
+    """t0 — момент старта по time.perf_counter(), по умолчанию — создание таймера"""
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.stages = {}  # этап -> мс
+        self.marks = {}  # событие -> мс от старта
+        self.done = False
+
+    def now_ms(self):
+        return (time.perf_counter() - self.t0) * 1000
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - t) * 1000
+
+    def mark(self, name):
+        """Отметить событие (только первое)"""
+        self.marks.setdefault(name, self.now_ms())
+
+    def report(self):
+        return {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stages": {k: round(v, 1) for k, v in self.stages.items()},
+            "marks": {k: round(v, 1) for k, v in self.marks.items()},
+        }
+
+    def finish(self, log_path=None):
+        """Вывести замеры в stderr и дописать в журнал (один раз за запуск)"""
+        if self.done:
+            return
+        self.done = True
+        report = self.report()
+        parts = [f"{k} {v:.0f}" for k, v in report["stages"].items()]
+        parts += [f"{k} @{v:.0f}" for k, v in report["marks"].items()]
+        print("startup ms: " + ", ".join(parts), file=sys.stderr)
+        if log_path:
+            try:
+                with open(log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(report, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+
+
+class LoadingScreen:
+    """Экран загрузки: заголовок, полоса прогресса и название текущего этапа"""
+    def __init__(self, screen):
+        self.screen = screen
+
+    def draw(self, progress, label=""):
+        screen = self.screen
+        w, h = screen.get_size()
+        screen.fill((12, 14, 24))
+        title = render_text("Загрузка...", 48, (230, 230, 240))
+        screen.blit(title, title.get_rect(center=(w // 2, h // 2 - 60)))
+        bar = pygame.Rect(0, 0, w // 2, 18)
+        bar.center = (w // 2, h // 2 + 10)
+        pygame.draw.rect(screen, (60, 64, 80), bar, border_radius=9)
+        fill = bar.copy()
+        fill.width = max(fill.height, int(bar.width * min(1.0, progress)))
+        pygame.draw.rect(screen, (120, 200, 120), fill, border_radius=9)
+        if label:
+            text = render_text(label, 24, (160, 160, 180))
+            screen.blit(text, text.get_rect(center=(w // 2, h // 2 + 50)))
+        pygame.display.flip()
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+import pygame
+
+TEXT_CACHE_SIZE = 256  # сколько отрисованных строк держать в памяти
+
+_fonts = {}  # (имя файла, размер) -> Font
+_texts = OrderedDict()  # (имя, размер, текст, цвет) -> Surface, в порядке использования
+
+
+def get_font(size, name=None):
+    """Один объект Font на каждую пару (шрифт, размер)"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.Font(name, size)
+    return font
+
+
+def render_text(text, size, color, name=None):
+    """Готовая поверхность с текстом; рендерится заново только для новых строк.
+
+    Давно не использованные строки вытесняются (LRU), поэтому меняющиеся
+    счётчики HUD не копятся в памяти бесконечно.
+    """
+    key = (name, size, text, tuple(color))
+    surf = _texts.get(key)
+    if surf is not None:
+        _texts.move_to_end(key)
+        return surf
+    surf = get_font(size, name).render(text, True, color)
+    _texts[key] = surf
+    if len(_texts) > TEXT_CACHE_SIZE:
+        _texts.popitem(last=False)
+    return surf
+
+
+_wraps = {}  # (текст, ширина, имя, размер) -> список строк
+
+
+def wrap_text(text, max_width, size, name=None):
+    """Разбивка текста на строки по ширине; считается один раз.
+
+    Ширина меряется через Font.size, без рендера промежуточных строк.
+    """
+    key = (text, max_width, name, size)
+    lines = _wraps.get(key)
+    if lines is not None:
+        return lines
+    font = get_font(size, name)
+    lines = []
+    line = ""
+    for w in text.split(" "):
+        test = (line + " " + w).strip()
+        if font.size(test)[0] > max_width and line != "":
+            lines.append(line)
+            line = w
+        else:
+            line = test
+    if line:
+        lines.append(line)
+    _wraps[key] = lines
+    return lines
+
+
+class TextBlock:
+    """Свёрстанный многострочный текст: поверхности строк живут вместе с блоком"""
+    def __init__(self, text, max_width, size, color, line_height, name=None):
+        font = get_font(size, name)
+        self.line_height = line_height
+        self.lines = [font.render(line, True, color)
+                      for line in wrap_text(text, max_width, size, name)]
+
+    def draw(self, surface, pos):
+        x, y = pos
+        for i, line in enumerate(self.lines):
+            surface.blit(line, (x, y + i * self.line_height))
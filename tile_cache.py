@@ -0,0 +1,98 @@
+from bisect import bisect_left
+
+import pygame
+from constants import TILE_SIZE, CHUNK_TILES
+
+
+class TileLayerCache:
+    """Тайловые слои, заранее отрисованные в чанки фиксированного размера.
+
+    Чанки запекаются один раз при загрузке уровня, а каждый кадр
+    рисуются только те, что попадают в область камеры.
+    """
+    def __init__(self, tiles, chunk_tiles=CHUNK_TILES):
+        self.chunk_size = chunk_tiles * TILE_SIZE
+        self.chunks = {}  # (cx, cy) -> Surface
+
+        # tiles: (Surface, x, y) в мировых координатах, в порядке отрисовки
+        for tile, world_x, world_y in tiles:
+            self._bake_tile(tile, world_x, world_y)
+
+    def _bake_tile(self, tile, world_x, world_y):
+        # храним чанки с премультиплицированной альфой, чтобы полупрозрачные
+        # края тайлов смешивались так же, как при прямой отрисовке на экран
+        if not tile.get_flags() & pygame.SRCALPHA:
+            tile = tile.convert_alpha()
+        elif tile.get_parent() is not None:
+            # premul_alpha() у subsurface читает пиксели от начала родителя
+            tile = tile.copy()
+        tile = tile.premul_alpha()
+        size = self.chunk_size
+        w, h = tile.get_size()
+        # тайл может быть больше ячейки — запекаем его во все задетые чанки
+        for cy in range(world_y // size, (world_y + h - 1) // size + 1):
+            for cx in range(world_x // size, (world_x + w - 1) // size + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    chunk = pygame.Surface((size, size), pygame.SRCALPHA).convert_alpha()
+                    self.chunks[(cx, cy)] = chunk
+                chunk.blit(tile, (world_x - cx * size, world_y - cy * size),
+                           special_flags=pygame.BLEND_PREMULTIPLIED)
+
+    def draw(self, surface, camera_offset):
+        """Рисует только чанки, пересекающие экран"""
+        size = self.chunk_size
+        view = surface.get_rect(topleft=(-camera_offset[0], -camera_offset[1]))
+        for cy in range(view.top // size, (view.bottom - 1) // size + 1):
+            for cx in range(view.left // size, (view.right - 1) // size + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is not None:
+                    surface.blit(chunk, (cx * size + camera_offset[0], cy * size + camera_offset[1]),
+                                 special_flags=pygame.BLEND_PREMULTIPLIED)
+
+
+class DecorationBatch:
+    """Статические tile-объекты уровня, подготовленные для отсечения камерой.
+
+    Элементы отсортированы по левому краю: видимый диапазон находится
+    бинарным поиском, а рисуется одним вызовом blits в исходном порядке.
+    """
+    def __init__(self, decorations):
+        # decorations: [(Surface, (x, y))] в порядке отрисовки
+        items = sorted(enumerate(decorations), key=lambda item: item[1][1][0])
+        self.order = [index for index, _ in items]
+        self.images = [image for _, (image, _) in items]
+        self.bounds = [image.get_rect(topleft=pos) for _, (image, pos) in items]
+        self.lefts = [rect.left for rect in self.bounds]
+        self.max_width = max((rect.width for rect in self.bounds), default=0)
+
+    def draw(self, surface, camera_offset):
+        ox, oy = camera_offset
+        view = surface.get_rect(topleft=(-ox, -oy))
+        start = bisect_left(self.lefts, view.left - self.max_width + 1)
+        stop = bisect_left(self.lefts, view.right)
+        visible = [i for i in range(start, stop) if self.bounds[i].colliderect(view)]
+        if not visible:
+            return
+        visible.sort(key=self.order.__getitem__)  # порядок наложения как в карте
+        surface.blits([(self.images[i], self.bounds[i].move(ox, oy)) for i in visible], doreturn=False)
+
+
+if __name__ == "__main__":
+    # python tile_cache.py — тайл-subsurface в чанке выглядит так же, как при прямой отрисовке
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    sheet = pygame.Surface((TILE_SIZE * 2, TILE_SIZE), pygame.SRCALPHA).convert_alpha()
+    sheet.fill((200, 40, 40, 255), (0, 0, TILE_SIZE, TILE_SIZE))
+    sheet.fill((40, 80, 200, 128), (TILE_SIZE, 0, TILE_SIZE, TILE_SIZE))
+    tile = sheet.subsurface((TILE_SIZE, 0, TILE_SIZE, TILE_SIZE))
+    size = CHUNK_TILES * TILE_SIZE
+    cached = pygame.Surface((size, size))
+    direct = pygame.Surface((size, size))
+    for target in (cached, direct):
+        target.fill((30, 30, 30))
+    TileLayerCache([(tile, TILE_SIZE, TILE_SIZE)]).draw(cached, (0, 0))
+    direct.blit(tile, (TILE_SIZE, TILE_SIZE))
+    same = pygame.image.tobytes(cached, "RGB") == pygame.image.tobytes(direct, "RGB")
+    print("subsurface tile:", "ok" if same else "differs")
+    raise SystemExit(0 if same else 1)